@@ -8,7 +8,6 @@ of the MCP Workflow System.
 
 import sys
 import os
-import json
 from typing import Dict, List, Any
 
 # Add the src directory to the path
@@ -29,14 +28,22 @@ def print_entity_collection(collection, indent=0):
     
     print(f"\n{ind}Relationships ({len(collection.relationships)}):")
     for rel in collection.relationships:
-        source_entity = next((e for e in collection.entities if e.id == rel.source_entity), None)
-        target_entity = next((e for e in collection.entities if e.id == rel.target_entity), None)
+        source_entity = collection.get_entity_by_id(rel.source_entity)
+        target_entity = collection.get_entity_by_id(rel.target_entity)
         
         if source_entity and target_entity:
             print(f"{ind}  - {source_entity.name} --[{rel.type}]--> {target_entity.name} (Confidence: {rel.confidence:.2f})")
 
 
-def extract_with_simple_extractor(text):
+def print_entity_collections(collections):
+    """Pretty print one entity collection per message."""
+    for i, collection in enumerate(collections, start=1):
+        print(f"Message {i}:")
+        print_entity_collection(collection, indent=2)
+        print()
+
+
+def extract_with_simple_extractor(texts):
     """Extract entities using the simple rule-based extractor."""
     print("\n=== Simple Rule-Based Extractor ===\n")
     
@@ -51,37 +58,43 @@ def extract_with_simple_extractor(text):
     extractor = SimpleRuleBasedExtractor(patterns)
     
     # Extract entities
-    collection = extractor.extract_entities(text, source_id="demo_1")
+    collections = extractor.extract_entities_batch(
+        texts, source_ids=[f"demo_1_{i}" for i in range(1, len(texts) + 1)]
+    )
     
     # Print the results
-    print_entity_collection(collection)
+    print_entity_collections(collections)
     
-    return collection
+    return collections
 
 
-def extract_with_spacy_extractor(text):
+def extract_with_spacy_extractor(texts):
     """Extract entities using the spaCy-based extractor."""
     print("\n=== spaCy-Based Extractor ===\n")
     
     # Create the extractor
     try:
         extractor = SpacyEntityExtractor(model_name="en_core_web_sm")
+        # The model loads in the background; wait so load errors surface here
+        extractor.nlp
     except Exception as e:
         print(f"Error initializing spaCy extractor: {e}")
         print("Make sure you have spaCy installed: pip install spacy")
         print("And the required model: python -m spacy download en_core_web_sm")
         return None
     
-    # Extract entities
-    collection = extractor.extract_entities(text, source_id="demo_2")
+    # Extract entities from all messages in one batch
+    collections = extractor.extract_entities_batch(
+        texts, source_ids=[f"demo_2_{i}" for i in range(1, len(texts) + 1)]
+    )
     
     # Print the results
-    print_entity_collection(collection)
+    print_entity_collections(collections)
     
-    return collection
+    return collections
 
 
-def extract_with_composite_extractor(text):
+def extract_with_composite_extractor(texts):
     """Extract entities using a composite extractor."""
     print("\n=== Composite Extractor ===\n")
     
@@ -96,6 +109,8 @@ def extract_with_composite_extractor(text):
     # Create the spaCy-based extractor
     try:
         spacy_extractor = SpacyEntityExtractor(model_name="en_core_web_sm")
+        # The model loads in the background; wait so load errors surface here
+        spacy_extractor.nlp
     except Exception as e:
         print(f"Error initializing spaCy extractor: {e}")
         print("Using only the simple rule-based extractor.")
@@ -108,19 +123,27 @@ def extract_with_composite_extractor(text):
     
     composite_extractor = CompositeEntityExtractor(extractors)
     
-    # Extract entities
-    collection = composite_extractor.extract_entities(text, source_id="demo_3")
+    # Extract entities from all messages in one batch
+    collections = composite_extractor.extract_entities_batch(
+        texts, source_ids=[f"demo_3_{i}" for i in range(1, len(texts) + 1)]
+    )
     
     # Print the results
-    print_entity_collection(collection)
+    print_entity_collections(collections)
     
-    return collection
+    return collections
+
+
+def save_collections_to_json(collections, prefix):
+    """Save one JSON file per entity collection."""
+    for i, collection in enumerate(collections, start=1):
+        save_collection_to_json(collection, f"{prefix}_{i}.json")
 
 
 def save_collection_to_json(collection, filename):
     """Save an entity collection to a JSON file."""
-    with open(filename, "w") as f:
-        json.dump(collection.to_dict(), f, indent=2)
+    with open(filename, "wb") as f:
+        collection.write_json(f)
     print(f"\nSaved collection to {filename}")
 
 
@@ -128,36 +151,36 @@ def main():
     """Run the entity extraction demo."""
     print("=== MCP Workflow System - Entity Extraction Demo ===\n")
     
-    # Sample text for entity extraction
-    text = """
-    Omar is working on a project called LifeSync, which uses Python and spaCy for natural language processing.
-    The project team includes John from Google and Alice from Microsoft. Bob is also interested in joining the team.
-    
-    LifeSync aims to create an intelligent workflow system that leverages LLM technology and AI for knowledge graph building.
-    The frontend will be built with React and Node.js.
-    
-    Claude from Anthropic has provided valuable insights into the project architecture.
-    """
+    # Sample messages for entity extraction
+    texts = [
+        "Omar is working on a project called LifeSync, which uses Python and spaCy for natural language processing. "
+        "The project team includes John from Google and Alice from Microsoft. Bob is also interested in joining the team.",
+        "LifeSync aims to create an intelligent workflow system that leverages LLM technology and AI for knowledge graph building. "
+        "The frontend will be built with React and Node.js.",
+        "Claude from Anthropic has provided valuable insights into the project architecture.",
+    ]
     
-    print("Sample Text:")
+    print("Sample Messages:")
     print("-" * 80)
-    print(text)
+    for text in texts:
+        print(text)
+        print()
     print("-" * 80)
     
-    # Extract entities using different extractors
-    simple_collection = extract_with_simple_extractor(text)
-    spacy_collection = extract_with_spacy_extractor(text)
-    composite_collection = extract_with_composite_extractor(text)
+    # Extract entities using different extractors, one batch per extractor
+    simple_collections = extract_with_simple_extractor(texts)
+    spacy_collections = extract_with_spacy_extractor(texts)
+    composite_collections = extract_with_composite_extractor(texts)
     
     # Save the results to JSON files
-    if simple_collection:
-        save_collection_to_json(simple_collection, "simple_extraction.json")
+    if simple_collections:
+        save_collections_to_json(simple_collections, "simple_extraction")
     
-    if spacy_collection:
-        save_collection_to_json(spacy_collection, "spacy_extraction.json")
+    if spacy_collections:
+        save_collections_to_json(spacy_collections, "spacy_extraction")
     
-    if composite_collection:
-        save_collection_to_json(composite_collection, "composite_extraction.json")
+    if composite_collections:
+        save_collections_to_json(composite_collections, "composite_extraction")
 
 
 if __name__ == "__main__":
@@ -9,7 +9,15 @@ setup(
         "spacy>=3.6.0",
         "networkx>=3.1",
         "pydantic>=2.4.0",
+        "orjson>=3.8.0",
+        "numpy>=1.24.0",
     ],
+    extras_require={
+        "fast": [
+            "pyahocorasick>=2.0.0",
+            "hyperscan>=0.4.0",
+        ],
+    },
     python_requires=">=3.10",
     author="Omar El Mountassir",
     author_email="omar.mountassir@gmail.com",
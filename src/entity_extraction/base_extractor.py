@@ -5,15 +5,245 @@ This module provides the foundational classes and functions for entity extractio
 in the MCP Workflow System.
 """
 
-from typing import Dict, List, Optional, Union, Any
+from typing import BinaryIO, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union, Any
 from abc import ABC, abstractmethod
+from array import array
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
-import json
-import uuid
+import itertools
+import os
+import re
+import secrets
 from datetime import datetime
 
+import numpy as np
+import orjson
 
-@dataclass
+try:
+    import ahocorasick
+except ImportError:  # pyahocorasick is an optional accelerator
+    ahocorasick = None
+
+try:
+    import hyperscan
+except ImportError:  # hyperscan is an optional accelerator
+    hyperscan = None
+
+
+def _is_word_char(char: str) -> bool:
+    """Check whether a character is a word character (letter, digit or underscore)."""
+    return char.isalnum() or char == "_"
+
+
+def _json_default(obj: Any) -> Any:
+    """
+    Serialize objects that orjson does not handle natively.
+    
+    orjson serializes the dataclasses itself; only the observation named
+    tuples need converting, to their dictionary form.
+    
+    Args:
+        obj: The object to serialize.
+        
+    Returns:
+        A JSON-serializable representation of the object.
+    """
+    if isinstance(obj, (EntityObservation, RelationshipObservation)):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class EntityObservation(NamedTuple):
+    """
+    A single observation of an entity in a source text.
+    
+    Rather than copies of the surrounding text, the observation keeps a
+    reference to the text it was made in and offsets into it; the context
+    strings are sliced out only when they are needed. Offsets are relative
+    to `text` shifted by `text_offset`: for observations recorded with the
+    source text, `text` is that text and `text_offset` is 0. Observations
+    rebuilt from context strings (from_context, from_dict) only hold those
+    strings, and their `context_start` is derived from the length of the
+    context before the mention rather than being a real source position.
+    """
+    
+    timestamp: str
+    source: str
+    extractor: str
+    text: str
+    text_offset: int
+    context_start: int
+    start: int
+    end: int
+    context_end: int
+    confidence: float
+    
+    @property
+    def context_before(self) -> str:
+        """Text before the entity mention."""
+        return self.text[self.context_start - self.text_offset:self.start - self.text_offset]
+    
+    @property
+    def exact(self) -> str:
+        """The entity mention itself."""
+        return self.text[self.start - self.text_offset:self.end - self.text_offset]
+    
+    @property
+    def context_after(self) -> str:
+        """Text after the entity mention."""
+        return self.text[self.end - self.text_offset:self.context_end - self.text_offset]
+    
+    def __repr__(self) -> str:
+        # Leave out `text`, which may be a whole source document
+        return (
+            f"{type(self).__name__}(timestamp={self.timestamp!r}, source={self.source!r}, "
+            f"extractor={self.extractor!r}, exact={self.exact!r}, start={self.start!r}, "
+            f"end={self.end!r}, confidence={self.confidence!r})"
+        )
+    
+    def _comparison_key(self) -> Tuple[Any, ...]:
+        """The serialized fields, which exclude where `text` starts and ends."""
+        return (
+            self.timestamp, self.source, self.extractor,
+            self.context_before, self.exact, self.context_after,
+            self.start, self.end, self.confidence
+        )
+    
+    def __eq__(self, other: object) -> bool:
+        # Compare what to_dict keeps, so a recorded observation equals its
+        # round-tripped copy, which only holds the context strings
+        if not isinstance(other, EntityObservation):
+            return NotImplemented
+        return self._comparison_key() == other._comparison_key()
+    
+    def __ne__(self, other: object) -> bool:
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+    
+    def __hash__(self) -> int:
+        return hash(self._comparison_key())
+    
+    def get_context_strings(self) -> Tuple[str, str]:
+        """
+        Get the context around the entity mention.
+        
+        Returns:
+            Tuple of (context_before, context_after).
+        """
+        return self.context_before, self.context_after
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the observation to a dictionary."""
+        return {
+            "timestamp": self.timestamp,
+            "source": self.source,
+            "extractor": self.extractor,
+            "context": {
+                "before": self.context_before,
+                "exact": self.exact,
+                "after": self.context_after
+            },
+            "position": {
+                "start": self.start,
+                "end": self.end
+            },
+            "confidence": self.confidence
+        }
+    
+    @classmethod
+    def from_context(
+        cls,
+        timestamp: str,
+        source: str,
+        extractor: str,
+        context_before: str,
+        exact: str,
+        context_after: str,
+        start: int,
+        end: int,
+        confidence: float
+    ) -> 'EntityObservation':
+        """Create an observation from already extracted context strings."""
+        text_offset = start - len(context_before)
+        return cls(
+            timestamp=timestamp,
+            source=source,
+            extractor=extractor,
+            text=context_before + exact + context_after,
+            text_offset=text_offset,
+            context_start=text_offset,
+            start=start,
+            end=end,
+            context_end=end + len(context_after),
+            confidence=confidence
+        )
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'EntityObservation':
+        """Create an observation from a dictionary."""
+        return cls.from_context(
+            timestamp=data["timestamp"],
+            source=data["source"],
+            extractor=data["extractor"],
+            context_before=data["context"]["before"],
+            exact=data["context"]["exact"],
+            context_after=data["context"]["after"],
+            start=data["position"]["start"],
+            end=data["position"]["end"],
+            confidence=data["confidence"]
+        )
+
+
+class RelationshipObservation(NamedTuple):
+    """A single observation of a relationship in a source text."""
+    
+    timestamp: str
+    source: str
+    extractor: str
+    context: str
+    confidence: float
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the observation to a dictionary."""
+        return self._asdict()
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'RelationshipObservation':
+        """Create an observation from a dictionary."""
+        return cls(**data)
+
+
+def _observations_to_dict(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Return metadata with recorded observations converted to dictionaries."""
+    observations = metadata.get("observations")
+    if not observations:
+        return metadata
+    return {
+        **metadata,
+        "observations": [
+            observation.to_dict()
+            if isinstance(observation, (EntityObservation, RelationshipObservation))
+            else observation
+            for observation in observations
+        ]
+    }
+
+
+def _observations_from_dict(metadata: Dict[str, Any], observation_cls: type) -> Dict[str, Any]:
+    """Return metadata with observation dictionaries converted to observations."""
+    observations = metadata.get("observations")
+    if not observations:
+        return metadata
+    return {
+        **metadata,
+        "observations": [
+            observation_cls.from_dict(observation) if isinstance(observation, dict) else observation
+            for observation in observations
+        ]
+    }
+
+
+@dataclass(slots=True)
 class Entity:
     """Represents an extracted entity."""
     
@@ -36,7 +266,7 @@ class Entity:
             "start_position": self.start_position,
             "end_position": self.end_position,
             "confidence": self.confidence,
-            "metadata": self.metadata
+            "metadata": _observations_to_dict(self.metadata)
         }
     
     @classmethod
@@ -50,15 +280,27 @@ class Entity:
             start_position=data["start_position"],
             end_position=data["end_position"],
             confidence=data["confidence"],
-            metadata=data.get("metadata", {})
+            metadata=_observations_from_dict(data.get("metadata", {}), EntityObservation)
         )
     
     def to_json(self) -> str:
         """Convert the entity to a JSON string."""
-        return json.dumps(self.to_dict())
+        return self.to_json_bytes().decode()
+    
+    def to_json_bytes(self, option: int = 0) -> bytes:
+        """
+        Convert the entity to UTF-8 encoded JSON.
+        
+        Args:
+            option: orjson option flags (e.g., orjson.OPT_INDENT_2).
+            
+        Returns:
+            The JSON document as bytes.
+        """
+        return orjson.dumps(self, default=_json_default, option=option)
 
 
-@dataclass
+@dataclass(slots=True)
 class Relationship:
     """Represents a relationship between entities."""
     
@@ -77,7 +319,7 @@ class Relationship:
             "target_entity": self.target_entity,
             "type": self.type,
             "confidence": self.confidence,
-            "metadata": self.metadata
+            "metadata": _observations_to_dict(self.metadata)
         }
     
     @classmethod
@@ -89,44 +331,225 @@ class Relationship:
             target_entity=data["target_entity"],
             type=data["type"],
             confidence=data["confidence"],
-            metadata=data.get("metadata", {})
+            metadata=_observations_from_dict(data.get("metadata", {}), RelationshipObservation)
         )
     
     def to_json(self) -> str:
         """Convert the relationship to a JSON string."""
-        return json.dumps(self.to_dict())
+        return self.to_json_bytes().decode()
+    
+    def to_json_bytes(self, option: int = 0) -> bytes:
+        """
+        Convert the relationship to UTF-8 encoded JSON.
+        
+        Args:
+            option: orjson option flags (e.g., orjson.OPT_INDENT_2).
+            
+        Returns:
+            The JSON document as bytes.
+        """
+        return orjson.dumps(self, default=_json_default, option=option)
 
 
-@dataclass
+class _TrackedList(list):
+    """
+    A list that counts the changes made to it.
+    
+    EntityCollection keeps its entities and relationships in tracked lists,
+    so its indexes can tell when a list was changed without going through
+    the collection.
+    """
+    
+    __slots__ = ("version",)
+    
+    def __new__(cls, *args, **kwargs) -> '_TrackedList':
+        # Set in __new__ so that unpickled and copied lists have it too
+        tracked = super().__new__(cls, *args, **kwargs)
+        tracked.version = 0
+        return tracked
+    
+    def __setitem__(self, index, value) -> None:
+        self.version += 1
+        super().__setitem__(index, value)
+    
+    def __delitem__(self, index) -> None:
+        self.version += 1
+        super().__delitem__(index)
+    
+    def __iadd__(self, values):
+        self.version += 1
+        return super().__iadd__(values)
+    
+    def __imul__(self, n):
+        self.version += 1
+        return super().__imul__(n)
+    
+    def append(self, value) -> None:
+        self.version += 1
+        super().append(value)
+    
+    def extend(self, values) -> None:
+        self.version += 1
+        super().extend(values)
+    
+    def insert(self, index, value) -> None:
+        self.version += 1
+        super().insert(index, value)
+    
+    def pop(self, index=-1):
+        self.version += 1
+        return super().pop(index)
+    
+    def remove(self, value) -> None:
+        self.version += 1
+        super().remove(value)
+    
+    def clear(self) -> None:
+        self.version += 1
+        super().clear()
+    
+    def sort(self, *args, **kwargs) -> None:
+        self.version += 1
+        super().sort(*args, **kwargs)
+    
+    def reverse(self) -> None:
+        self.version += 1
+        super().reverse()
+
+
+@dataclass(slots=True)
 class EntityCollection:
     """A collection of entities and relationships."""
     
     entities: List[Entity] = field(default_factory=list)
     relationships: List[Relationship] = field(default_factory=list)
     source_id: Optional[str] = None
+    _id_index: Dict[str, Entity] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    _name_index: Dict[str, List[Entity]] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    # Entity types as a dictionary-encoded column parallel to `entities`
+    _type_to_code: Dict[str, int] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    _type_codes: array = field(
+        default_factory=lambda: array("i"), init=False, repr=False, compare=False
+    )
+    # Relationship types, encoded the same way, parallel to `relationships`
+    _relationship_type_to_code: Dict[str, int] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    _relationship_type_codes: array = field(
+        default_factory=lambda: array("i"), init=False, repr=False, compare=False
+    )
+    # Versions of the tracked lists the indexes were built from (-1: stale)
+    _entities_version: int = field(default=-1, init=False, repr=False, compare=False)
+    _relationships_version: int = field(default=-1, init=False, repr=False, compare=False)
+    
+    def __setattr__(self, name: str, value: Any) -> None:
+        """Keep `entities` and `relationships` in tracked lists."""
+        if name in ("entities", "relationships"):
+            if not isinstance(value, _TrackedList):
+                value = _TrackedList(value)
+            # A new list always invalidates the indexes
+            object.__setattr__(self, f"_{name}_version", -1)
+        object.__setattr__(self, name, value)
+    
+    def __post_init__(self) -> None:
+        """Index any entities and relationships the collection was created with."""
+        self._sync_index()
+        self._sync_relationship_index()
+    
+    def _index_entity(self, entity: Entity) -> None:
+        """Add an entity to the ID and name indexes and the type column."""
+        self._id_index[entity.id] = entity
+        self._name_index.setdefault(entity.name, []).append(entity)
+        code = self._type_to_code.setdefault(entity.type, len(self._type_to_code))
+        self._type_codes.append(code)
+    
+    def _index_relationships(self, relationships: List[Relationship]) -> None:
+        """Add relationships to the relationship type column."""
+        type_to_code = self._relationship_type_to_code
+        self._relationship_type_codes.extend(
+            type_to_code.setdefault(rel.type, len(type_to_code)) for rel in relationships
+        )
+    
+    def _sync_index(self) -> None:
+        """
+        Rebuild the entity indexes and the type column if `entities` changed.
+        
+        add_entity keeps them current, so this is a version check unless the
+        list was changed or replaced directly.
+        """
+        if self.entities.version == self._entities_version:
+            return
+        self._id_index.clear()
+        self._name_index.clear()
+        self._type_to_code.clear()
+        del self._type_codes[:]
+        for entity in self.entities:
+            self._index_entity(entity)
+        self._entities_version = self.entities.version
+    
+    def _sync_relationship_index(self) -> None:
+        """Rebuild the relationship type column if `relationships` changed."""
+        if self.relationships.version == self._relationships_version:
+            return
+        self._relationship_type_to_code.clear()
+        del self._relationship_type_codes[:]
+        self._index_relationships(self.relationships)
+        self._relationships_version = self.relationships.version
     
     def add_entity(self, entity: Entity) -> None:
         """Add an entity to the collection."""
+        self._sync_index()
         self.entities.append(entity)
+        self._index_entity(entity)
+        self._entities_version = self.entities.version
     
     def add_relationship(self, relationship: Relationship) -> None:
         """Add a relationship to the collection."""
+        self._sync_relationship_index()
         self.relationships.append(relationship)
+        self._index_relationships([relationship])
+        self._relationships_version = self.relationships.version
+    
+    def add_relationships(self, relationships: List[Relationship]) -> None:
+        """Add several relationships to the collection at once."""
+        self._sync_relationship_index()
+        self.relationships.extend(relationships)
+        self._index_relationships(relationships)
+        self._relationships_version = self.relationships.version
     
     def get_entity_by_id(self, entity_id: str) -> Optional[Entity]:
         """Get an entity by its ID."""
-        for entity in self.entities:
-            if entity.id == entity_id:
-                return entity
-        return None
+        self._sync_index()
+        return self._id_index.get(entity_id)
+    
+    def get_entities_by_name(self, name: str) -> List[Entity]:
+        """Get all entities with a specific name."""
+        self._sync_index()
+        return list(self._name_index.get(name, ()))
     
     def get_entities_by_type(self, entity_type: str) -> List[Entity]:
         """Get all entities of a specific type."""
-        return [entity for entity in self.entities if entity.type == entity_type]
+        self._sync_index()
+        code = self._type_to_code.get(entity_type)
+        if code is None:
+            return []
+        type_codes = np.frombuffer(self._type_codes, dtype=np.intc)
+        return [self.entities[i] for i in np.flatnonzero(type_codes == code)]
     
     def get_relationships_by_type(self, relationship_type: str) -> List[Relationship]:
         """Get all relationships of a specific type."""
-        return [rel for rel in self.relationships if rel.type == relationship_type]
+        self._sync_relationship_index()
+        code = self._relationship_type_to_code.get(relationship_type)
+        if code is None:
+            return []
+        type_codes = np.frombuffer(self._relationship_type_codes, dtype=np.intc)
+        return [self.relationships[i] for i in np.flatnonzero(type_codes == code)]
     
     def get_relationships_for_entity(self, entity_id: str) -> List[Relationship]:
         """Get all relationships involving a specific entity."""
@@ -146,16 +569,59 @@ class EntityCollection:
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'EntityCollection':
         """Create a collection from a dictionary."""
-        collection = cls(source_id=data.get("source_id"))
-        for entity_data in data.get("entities", []):
-            collection.add_entity(Entity.from_dict(entity_data))
-        for rel_data in data.get("relationships", []):
-            collection.add_relationship(Relationship.from_dict(rel_data))
-        return collection
+        # Build both lists up front and let __post_init__ index them in one go
+        return cls(
+            entities=[Entity.from_dict(entity_data) for entity_data in data.get("entities", [])],
+            relationships=[
+                Relationship.from_dict(rel_data) for rel_data in data.get("relationships", [])
+            ],
+            source_id=data.get("source_id")
+        )
+    
+    @classmethod
+    def from_json(cls, data: Union[str, bytes]) -> 'EntityCollection':
+        """Create a collection from a JSON document, as produced by to_json."""
+        return cls.from_dict(orjson.loads(data))
     
     def to_json(self) -> str:
         """Convert the collection to a JSON string."""
-        return json.dumps(self.to_dict())
+        return self.to_json_bytes().decode()
+    
+    def to_json_bytes(self, option: int = 0) -> bytes:
+        """
+        Convert the collection to UTF-8 encoded JSON.
+        
+        Args:
+            option: orjson option flags (e.g., orjson.OPT_INDENT_2).
+            
+        Returns:
+            The JSON document as bytes.
+        """
+        return orjson.dumps(self, default=_json_default, option=option)
+    
+    def write_json(self, f: BinaryIO) -> None:
+        """
+        Write the collection as JSON, one entity or relationship at a time.
+        
+        Produces the same document as to_json, without holding the whole
+        serialized collection in memory.
+        
+        Args:
+            f: A file object opened for writing in binary mode.
+        """
+        f.write(b'{"entities":[')
+        for i, entity in enumerate(self.entities):
+            if i:
+                f.write(b",")
+            f.write(entity.to_json_bytes())
+        f.write(b'],"relationships":[')
+        for i, relationship in enumerate(self.relationships):
+            if i:
+                f.write(b",")
+            f.write(relationship.to_json_bytes())
+        f.write(b'],"source_id":')
+        f.write(orjson.dumps(self.source_id))
+        f.write(b"}")
 
 
 class EntityExtractor(ABC):
@@ -174,19 +640,86 @@ class EntityExtractor(ABC):
             A collection of extracted entities and relationships.
         """
         pass
+    
+    def extract_entities_batch(
+        self,
+        texts: Iterable[str],
+        source_ids: Optional[Iterable[Optional[str]]] = None,
+        **kwargs
+    ) -> List[EntityCollection]:
+        """
+        Extract entities from several texts.
+        
+        The default implementation calls extract_entities for each text in
+        turn; extractors that can process texts in bulk should override it.
+        
+        Args:
+            texts: The texts to extract entities from.
+            source_ids: Optional source identifier for each text, one per
+                text. If not given, a source_id keyword argument applies to
+                every text.
+            **kwargs: Additional extractor-specific parameters.
+            
+        Returns:
+            One collection of extracted entities and relationships per text.
+        """
+        if source_ids is None:
+            return [self.extract_entities(text, **kwargs) for text in texts]
+        
+        kwargs.pop("source_id", None)
+        return [
+            self.extract_entities(text, source_id=source_id, **kwargs)
+            for text, source_id in zip(texts, source_ids, strict=True)
+        ]
 
 
 class CompositeEntityExtractor(EntityExtractor):
-    """An entity extractor that combines multiple extractors."""
+    """
+    An entity extractor that combines multiple extractors.
     
-    def __init__(self, extractors: List[EntityExtractor]):
+    The extractors run concurrently in a thread pool. This pays off when
+    extractors spend their time in native code that releases the GIL, such
+    as spaCy's pipeline components. Pure-Python extractors such as
+    SimpleRuleBasedExtractor hold the GIL, so composites of only those
+    should pass max_workers=1 and run them in turn.
+    """
+    
+    def __init__(self, extractors: List[EntityExtractor], max_workers: Optional[int] = None):
         """
         Initialize the composite extractor.
         
         Args:
             extractors: A list of entity extractors to use.
+            max_workers: Maximum number of extractors to run at once
+                (defaults to one thread per extractor; 1 runs them in turn).
         """
         self.extractors = extractors
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+    
+    def _run_extractors(self, run: Callable[[EntityExtractor], Any]) -> List[Any]:
+        """
+        Call a function with each extractor, concurrently where possible.
+        
+        Args:
+            run: The function to call with each extractor.
+            
+        Returns:
+            The results, in extractor order.
+        """
+        max_workers = self.max_workers or len(self.extractors)
+        if max_workers <= 1 or len(self.extractors) <= 1:
+            return [run(extractor) for extractor in self.extractors]
+        
+        # Start the pool on first use and keep it for later calls
+        executor = self._executor
+        if executor is None:
+            executor = self._executor = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="composite-extractor"
+            )
+        
+        futures = [executor.submit(run, extractor) for extractor in self.extractors]
+        return [future.result() for future in futures]
     
     def extract_entities(self, text: str, **kwargs) -> EntityCollection:
         """
@@ -199,30 +732,85 @@ class CompositeEntityExtractor(EntityExtractor):
         Returns:
             A combined collection of entities and relationships.
         """
-        # Create an empty collection for the result
-        result_collection = EntityCollection()
+        # Share one creation timestamp across all extractors
+        kwargs.setdefault("created_at", datetime.now().isoformat())
+        
+        collections = self._run_extractors(
+            lambda extractor: extractor.extract_entities(text, **kwargs)
+        )
+        return self._merge_collections(collections)
+    
+    def extract_entities_batch(
+        self,
+        texts: Iterable[str],
+        source_ids: Optional[Iterable[Optional[str]]] = None,
+        **kwargs
+    ) -> List[EntityCollection]:
+        """
+        Extract entities from several texts using all configured extractors.
         
-        # Extract entities using each extractor
-        for extractor in self.extractors:
-            collection = extractor.extract_entities(text, **kwargs)
+        Each extractor processes the whole batch at once, so extractors that
+        override extract_entities_batch keep their bulk processing.
+        
+        Args:
+            texts: The texts to extract entities from.
+            source_ids: Optional source identifier for each text, one per text.
+            **kwargs: Additional parameters passed to each extractor.
             
+        Returns:
+            One combined collection of entities and relationships per text.
+        """
+        # Share one creation timestamp across all extractors
+        kwargs.setdefault("created_at", datetime.now().isoformat())
+        
+        # Every extractor iterates over the inputs, so materialize them once
+        texts = list(texts)
+        if source_ids is not None:
+            source_ids = list(source_ids)
+            if len(source_ids) != len(texts):
+                raise ValueError(f"Got {len(source_ids)} source_ids for {len(texts)} texts")
+        
+        if not self.extractors:
+            if source_ids is None:
+                source_ids = [kwargs.get("source_id")] * len(texts)
+            return [EntityCollection(source_id=source_id) for source_id in source_ids]
+        
+        batches = self._run_extractors(
+            lambda extractor: extractor.extract_entities_batch(texts, source_ids, **kwargs)
+        )
+        return [self._merge_collections(list(collections)) for collections in zip(*batches)]
+    
+    @staticmethod
+    def _merge_collections(collections: List[EntityCollection]) -> EntityCollection:
+        """
+        Merge the collections produced by each extractor for one text.
+        
+        Args:
+            collections: The collections to merge, in extractor order.
+            
+        Returns:
+            A combined collection of entities and relationships.
+        """
+        # Create an empty collection for the result, keeping the text's source
+        result_collection = EntityCollection(
+            source_id=next((c.source_id for c in collections if c.source_id is not None), None)
+        )
+        
+        # Index of kept entities by (name, type) for duplicate detection
+        seen: Dict[Tuple[str, str], Entity] = {}
+        
+        for collection in collections:
             # Add entities and relationships to the result collection
             for entity in collection.entities:
-                # Check for duplicate entities (simplified approach)
-                duplicate = False
-                for existing_entity in result_collection.entities:
-                    if (
-                        existing_entity.name == entity.name and 
-                        existing_entity.type == entity.type
-                    ):
-                        # If we find a duplicate, keep the one with higher confidence
-                        if entity.confidence > existing_entity.confidence:
-                            existing_entity.confidence = entity.confidence
-                            existing_entity.metadata.update(entity.metadata)
-                        duplicate = True
-                        break
-                
-                if not duplicate:
+                key = (entity.name, entity.type)
+                existing_entity = seen.get(key)
+                if existing_entity is not None:
+                    # If we find a duplicate, keep the one with higher confidence
+                    if entity.confidence > existing_entity.confidence:
+                        existing_entity.confidence = entity.confidence
+                        existing_entity.metadata.update(entity.metadata)
+                else:
+                    seen[key] = entity
                     result_collection.add_entity(entity)
             
             # Add all relationships
@@ -287,17 +875,36 @@ class ConfidenceCalculator:
 
 
 class EntityFactory:
-    """Factory class for creating entities and relationships."""
+    """
+    Factory class for creating entities and relationships.
     
-    @staticmethod
+    IDs are a random per-process prefix followed by a counter, which keeps
+    them unique within a process without reading from the OS random source
+    for every entity and relationship.
+    """
+    
+    _id_prefix = secrets.token_hex(8)
+    _entity_counter = itertools.count()
+    _relationship_counter = itertools.count()
+    
+    @classmethod
+    def _reseed(cls) -> None:
+        """Start a fresh ID sequence (e.g., in a forked child process)."""
+        cls._id_prefix = secrets.token_hex(8)
+        cls._entity_counter = itertools.count()
+        cls._relationship_counter = itertools.count()
+    
+    @classmethod
     def create_entity(
+        cls,
         name: str,
         entity_type: str,
         source_text: str,
         start_position: int,
         end_position: int,
         confidence: float,
-        metadata: Optional[Dict[str, Any]] = None
+        metadata: Optional[Dict[str, Any]] = None,
+        created_at: Optional[str] = None
     ) -> Entity:
         """
         Create a new entity with a unique ID.
@@ -310,18 +917,19 @@ class EntityFactory:
             end_position: The end position of the entity in the source text.
             confidence: The confidence score for the entity.
             metadata: Additional metadata for the entity.
+            created_at: Creation timestamp to record (defaults to now).
             
         Returns:
             A new Entity instance.
         """
-        entity_id = str(uuid.uuid4())
+        entity_id = f"{cls._id_prefix}-e{next(cls._entity_counter):x}"
         
         if metadata is None:
             metadata = {}
         
         # Add creation timestamp to metadata
         if "created_at" not in metadata:
-            metadata["created_at"] = datetime.now().isoformat()
+            metadata["created_at"] = created_at or datetime.now().isoformat()
         
         return Entity(
             id=entity_id,
@@ -334,13 +942,15 @@ class EntityFactory:
             metadata=metadata
         )
     
-    @staticmethod
+    @classmethod
     def create_relationship(
+        cls,
         source_entity: str,
         target_entity: str,
         relationship_type: str,
         confidence: float,
-        metadata: Optional[Dict[str, Any]] = None
+        metadata: Optional[Dict[str, Any]] = None,
+        created_at: Optional[str] = None
     ) -> Relationship:
         """
         Create a new relationship with a unique ID.
@@ -351,18 +961,19 @@ class EntityFactory:
             relationship_type: The type of the relationship.
             confidence: The confidence score for the relationship.
             metadata: Additional metadata for the relationship.
+            created_at: Creation timestamp to record (defaults to now).
             
         Returns:
             A new Relationship instance.
         """
-        relationship_id = str(uuid.uuid4())
+        relationship_id = f"{cls._id_prefix}-r{next(cls._relationship_counter):x}"
         
         if metadata is None:
             metadata = {}
         
         # Add creation timestamp to metadata
         if "created_at" not in metadata:
-            metadata["created_at"] = datetime.now().isoformat()
+            metadata["created_at"] = created_at or datetime.now().isoformat()
         
         return Relationship(
             id=relationship_id,
@@ -374,8 +985,18 @@ class EntityFactory:
         )
 
 
+# Forked children must not hand out the same IDs as their parent
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=EntityFactory._reseed)
+
+
 class ObservationRecorder:
-    """Utility class for recording observations about entities and relationships."""
+    """
+    Utility class for recording observations about entities and relationships.
+    
+    Observations are stored in metadata["observations"] as compact named
+    tuples and only expanded to nested dictionaries when serialized.
+    """
     
     @staticmethod
     def record_entity_observation(
@@ -383,7 +1004,11 @@ class ObservationRecorder:
         source: str,
         context_before: str = "",
         context_after: str = "",
-        extractor: str = "unknown"
+        extractor: str = "unknown",
+        created_at: Optional[str] = None,
+        text: Optional[str] = None,
+        context_window: int = 50,
+        context_bounds: Optional[Tuple[int, int]] = None
     ) -> None:
         """
         Record an observation of an entity.
@@ -394,27 +1019,51 @@ class ObservationRecorder:
             context_before: Text before the entity mention.
             context_after: Text after the entity mention.
             extractor: The extractor that identified the entity.
+            created_at: Timestamp of the observation (defaults to now).
+            text: The full source text. When given, the observation keeps a
+                reference to it and the context is taken from up to
+                context_window characters on each side of the entity,
+                instead of from context_before and context_after.
+            context_window: Number of context characters on each side.
+            context_bounds: Start and end offsets of the context in text,
+                used instead of context_window when given.
         """
         # Initialize observations list if it doesn't exist
         if "observations" not in entity.metadata:
             entity.metadata["observations"] = []
         
         # Create the observation
-        observation = {
-            "timestamp": datetime.now().isoformat(),
-            "source": source,
-            "extractor": extractor,
-            "context": {
-                "before": context_before,
-                "exact": entity.source_text,
-                "after": context_after
-            },
-            "position": {
-                "start": entity.start_position,
-                "end": entity.end_position
-            },
-            "confidence": entity.confidence
-        }
+        timestamp = created_at or datetime.now().isoformat()
+        if text is not None:
+            if context_bounds is None:
+                context_bounds = (
+                    max(0, entity.start_position - context_window),
+                    min(len(text), entity.end_position + context_window)
+                )
+            observation = EntityObservation(
+                timestamp=timestamp,
+                source=source,
+                extractor=extractor,
+                text=text,
+                text_offset=0,
+                context_start=context_bounds[0],
+                start=entity.start_position,
+                end=entity.end_position,
+                context_end=context_bounds[1],
+                confidence=entity.confidence
+            )
+        else:
+            observation = EntityObservation.from_context(
+                timestamp=timestamp,
+                source=source,
+                extractor=extractor,
+                context_before=context_before,
+                exact=entity.source_text,
+                context_after=context_after,
+                start=entity.start_position,
+                end=entity.end_position,
+                confidence=entity.confidence
+            )
         
         # Add the observation
         entity.metadata["observations"].append(observation)
@@ -424,7 +1073,8 @@ class ObservationRecorder:
         relationship: Relationship,
         source: str,
         context: str = "",
-        extractor: str = "unknown"
+        extractor: str = "unknown",
+        created_at: Optional[str] = None
     ) -> None:
         """
         Record an observation of a relationship.
@@ -434,19 +1084,20 @@ class ObservationRecorder:
             source: The source of the observation (e.g., message ID).
             context: The context in which the relationship was observed.
             extractor: The extractor that identified the relationship.
+            created_at: Timestamp of the observation (defaults to now).
         """
         # Initialize observations list if it doesn't exist
         if "observations" not in relationship.metadata:
             relationship.metadata["observations"] = []
         
         # Create the observation
-        observation = {
-            "timestamp": datetime.now().isoformat(),
-            "source": source,
-            "extractor": extractor,
-            "context": context,
-            "confidence": relationship.confidence
-        }
+        observation = RelationshipObservation(
+            timestamp=created_at or datetime.now().isoformat(),
+            source=source,
+            extractor=extractor,
+            context=context,
+            confidence=relationship.confidence
+        )
         
         # Add the observation
         relationship.metadata["observations"].append(observation)
@@ -456,14 +1107,240 @@ class ObservationRecorder:
 class SimpleRuleBasedExtractor(EntityExtractor):
     """A simple rule-based entity extractor for demonstration."""
     
-    def __init__(self, entity_patterns: Dict[str, List[str]]):
+    def __init__(
+        self,
+        entity_patterns: Dict[str, List[str]],
+        max_pairs_per_type: Optional[int] = None
+    ):
         """
         Initialize the extractor with entity patterns.
         
         Args:
             entity_patterns: A dictionary mapping entity types to lists of patterns.
+            max_pairs_per_type: Maximum number of "relatesTo" relationships to
+                create between entities of the same type (None for no limit).
         """
         self.entity_patterns = entity_patterns
+        if max_pairs_per_type is not None and max_pairs_per_type < 0:
+            raise ValueError(
+                f"max_pairs_per_type must be non-negative, got {max_pairs_per_type}"
+            )
+        self.max_pairs_per_type = max_pairs_per_type
+        self._automaton = self._build_automaton(entity_patterns)
+        self._hs_database, self._hs_patterns = self._build_hyperscan_database(entity_patterns)
+        
+        # Without the automaton, fall back to a single compiled regex
+        self._regex, self._type_by_pattern = (
+            self._build_regex(entity_patterns) if self._automaton is None else (None, {})
+        )
+    
+    @staticmethod
+    def _build_automaton(entity_patterns: Dict[str, List[str]]) -> Optional[Any]:
+        """
+        Build an Aho-Corasick automaton over all patterns.
+        
+        Args:
+            entity_patterns: A dictionary mapping entity types to lists of patterns.
+            
+        Returns:
+            The automaton, or None if pyahocorasick is not installed or there
+            are no patterns to match.
+        """
+        if ahocorasick is None:
+            return None
+        
+        # A pattern may be listed under several entity types
+        types_by_pattern: Dict[str, List[str]] = {}
+        for entity_type, patterns in entity_patterns.items():
+            for pattern in patterns:
+                if pattern:
+                    types_by_pattern.setdefault(pattern, []).append(entity_type)
+        
+        if not types_by_pattern:
+            return None
+        
+        automaton = ahocorasick.Automaton()
+        for pattern, entity_types in types_by_pattern.items():
+            automaton.add_word(pattern, (pattern, tuple(entity_types)))
+        automaton.make_automaton()
+        return automaton
+    
+    @staticmethod
+    def _build_hyperscan_database(
+        entity_patterns: Dict[str, List[str]]
+    ) -> Tuple[Optional[Any], List[Tuple[str, str]]]:
+        """
+        Compile all patterns into a Hyperscan block-mode database.
+        
+        Args:
+            entity_patterns: A dictionary mapping entity types to lists of patterns.
+            
+        Returns:
+            A tuple of (database, patterns), where patterns maps each expression
+            ID to its (entity type, pattern). The database is None if hyperscan
+            is not installed or there are no patterns to match.
+        """
+        if hyperscan is None:
+            return None, []
+        
+        id_to_type_pattern = [
+            (entity_type, pattern)
+            for entity_type, patterns in entity_patterns.items()
+            for pattern in patterns
+            if pattern
+        ]
+        if not id_to_type_pattern:
+            return None, []
+        
+        # Patterns are literals, so escape them before compiling
+        database = hyperscan.Database()
+        database.compile(
+            expressions=[re.escape(pattern).encode() for _, pattern in id_to_type_pattern],
+            ids=list(range(len(id_to_type_pattern))),
+            elements=len(id_to_type_pattern),
+            flags=[hyperscan.HS_FLAG_SOM_LEFTMOST] * len(id_to_type_pattern)
+        )
+        return database, id_to_type_pattern
+    
+    @staticmethod
+    def _build_regex(
+        entity_patterns: Dict[str, List[str]]
+    ) -> Tuple[Optional[re.Pattern], Dict[str, str]]:
+        """
+        Compile all patterns into a single alternation.
+        
+        Longer patterns come first so that the alternation prefers them at
+        a given position.
+        
+        Args:
+            entity_patterns: A dictionary mapping entity types to lists of patterns.
+            
+        Returns:
+            A tuple of (regex, type_by_pattern), where type_by_pattern maps
+            each pattern to its entity type. The regex is None if there are
+            no patterns to match.
+        """
+        type_by_pattern: Dict[str, str] = {}
+        for entity_type, patterns in entity_patterns.items():
+            for pattern in patterns:
+                if pattern:
+                    type_by_pattern.setdefault(pattern, entity_type)
+        
+        if not type_by_pattern:
+            return None, {}
+        
+        # Lookarounds keep matches on word boundaries, the same rule as
+        # _at_word_boundary, while letting the alternation fall back to a
+        # shorter pattern when a longer one is rejected
+        alternatives = []
+        for literal in sorted(type_by_pattern, key=len, reverse=True):
+            alternative = re.escape(literal)
+            if _is_word_char(literal[0]):
+                alternative = r"(?<!\w)" + alternative
+            if _is_word_char(literal[-1]):
+                alternative += r"(?!\w)"
+            alternatives.append(alternative)
+        regex = re.compile("|".join(alternatives))
+        return regex, type_by_pattern
+    
+    @staticmethod
+    def _at_word_boundary(text: str, start: int, end: int) -> bool:
+        """
+        Check that a match does not start or end in the middle of a word.
+        
+        Only edges where the pattern itself has a word character are
+        checked, so patterns such as ".NET" still match after a space.
+        
+        Args:
+            text: The searched text.
+            start: Start position of the match.
+            end: End position of the match.
+            
+        Returns:
+            True if the match lies on word boundaries.
+        """
+        if start > 0 and _is_word_char(text[start]) and _is_word_char(text[start - 1]):
+            return False
+        if end < len(text) and _is_word_char(text[end - 1]) and _is_word_char(text[end]):
+            return False
+        return True
+    
+    def _find_matches(self, text: str) -> List[Tuple[int, str, str]]:
+        """
+        Find all pattern occurrences in the text that lie on word boundaries.
+        
+        Args:
+            text: The text to search.
+            
+        Returns:
+            A list of (start position, entity type, pattern) tuples.
+        """
+        matches = []
+        
+        # Hyperscan reports byte offsets, which only equal character offsets
+        # for ASCII text
+        if self._hs_database is not None and text.isascii():
+            def on_match(match_id, start, end, flags, context):
+                context.append((start, match_id))
+            
+            raw_matches: List[Tuple[int, int]] = []
+            scratch = hyperscan.Scratch(self._hs_database)
+            self._hs_database.scan(
+                text.encode(),
+                match_event_handler=on_match,
+                context=raw_matches,
+                scratch=scratch
+            )
+            for start_idx, match_id in raw_matches:
+                entity_type, pattern = self._hs_patterns[match_id]
+                if self._at_word_boundary(text, start_idx, start_idx + len(pattern)):
+                    matches.append((start_idx, entity_type, pattern))
+            return matches
+        
+        if self._automaton is not None:
+            # Single pass over the text for all patterns. Every match is
+            # reported, so a shorter pattern still counts when a longer one
+            # at the same position is not on a word boundary.
+            for end_idx, (pattern, entity_types) in self._automaton.iter(text):
+                start_idx = end_idx - len(pattern) + 1
+                if not self._at_word_boundary(text, start_idx, end_idx + 1):
+                    continue
+                for entity_type in entity_types:
+                    matches.append((start_idx, entity_type, pattern))
+            return matches
+        
+        # Fallback: a single C-level regex scan for all patterns
+        if self._regex is not None:
+            type_by_pattern = self._type_by_pattern
+            matches = [
+                (match.start(), type_by_pattern[match.group()], match.group())
+                for match in self._regex.finditer(text)
+            ]
+        
+        return matches
+    
+    @staticmethod
+    def _resolve_overlaps(matches: List[Tuple[int, str, str]]) -> List[Tuple[int, str, str]]:
+        """
+        Drop matches that overlap an earlier or longer match.
+        
+        Matches are swept in order of position, preferring the longest match
+        at each position, so "Node.js" wins over "Node" at the same offset.
+        
+        Args:
+            matches: A list of (start position, entity type, pattern) tuples.
+            
+        Returns:
+            The non-overlapping matches, ordered by position.
+        """
+        resolved = []
+        last_end = 0
+        for match in sorted(matches, key=lambda m: (m[0], -len(m[2]))):
+            start_idx, _, pattern = match
+            if start_idx >= last_end:
+                resolved.append(match)
+                last_end = start_idx + len(pattern)
+        return resolved
     
     def extract_entities(self, text: str, **kwargs) -> EntityCollection:
         """
@@ -472,6 +1349,8 @@ class SimpleRuleBasedExtractor(EntityExtractor):
         Args:
             text: The text to extract entities from.
             **kwargs: Additional parameters.
+                source_id: Optional source identifier.
+                created_at: Optional timestamp shared by everything extracted.
             
         Returns:
             A collection of extracted entities.
@@ -479,73 +1358,118 @@ class SimpleRuleBasedExtractor(EntityExtractor):
         collection = EntityCollection()
         source_id = kwargs.get("source_id", None)
         collection.source_id = source_id
+        created_at = kwargs.get("created_at") or datetime.now().isoformat()
+        
+        # Entities grouped by type, for the relationships created below
+        entities_by_type: Dict[str, List[Entity]] = {}
         
         # Simple implementation for demonstration
-        for entity_type, patterns in self.entity_patterns.items():
-            for pattern in patterns:
-                start_idx = 0
-                while True:
-                    # Find the pattern in the text
-                    idx = text.find(pattern, start_idx)
-                    if idx == -1:
-                        break
-                    
-                    # Create an entity
-                    entity = EntityFactory.create_entity(
-                        name=pattern,
-                        entity_type=entity_type,
-                        source_text=pattern,
-                        start_position=idx,
-                        end_position=idx + len(pattern),
-                        confidence=0.8,  # Fixed confidence for demonstration
-                        metadata={"extractor": "SimpleRuleBasedExtractor"}
-                    )
-                    
-                    # Record an observation
-                    context_before = text[max(0, idx-50):idx]
-                    context_after = text[idx+len(pattern):min(len(text), idx+len(pattern)+50)]
-                    ObservationRecorder.record_entity_observation(
-                        entity=entity,
-                        source=source_id or "unknown",
-                        context_before=context_before,
-                        context_after=context_after,
-                        extractor="SimpleRuleBasedExtractor"
-                    )
-                    
-                    # Add the entity to the collection
-                    collection.add_entity(entity)
-                    
-                    # Move to the next occurrence
-                    start_idx = idx + len(pattern)
-        
-        # For demonstration, we'll create relationships between entities of the same type
-        entities_by_type = {}
-        for entity in collection.entities:
-            if entity.type not in entities_by_type:
-                entities_by_type[entity.type] = []
-            entities_by_type[entity.type].append(entity)
-        
-        # Create "relatesTo" relationships between entities of the same type
+        for idx, entity_type, pattern in self._resolve_overlaps(self._find_matches(text)):
+            # Create an entity
+            entity = EntityFactory.create_entity(
+                name=pattern,
+                entity_type=entity_type,
+                source_text=pattern,
+                start_position=idx,
+                end_position=idx + len(pattern),
+                confidence=0.8,  # Fixed confidence for demonstration
+                metadata={"extractor": "SimpleRuleBasedExtractor"},
+                created_at=created_at
+            )
+            
+            # Record an observation
+            ObservationRecorder.record_entity_observation(
+                entity=entity,
+                source=source_id or "unknown",
+                extractor="SimpleRuleBasedExtractor",
+                created_at=created_at,
+                text=text
+            )
+            
+            # Add the entity to the collection
+            collection.add_entity(entity)
+            entities_by_type.setdefault(entity_type, []).append(entity)
+        
+        # For demonstration, we'll create "relatesTo" relationships between
+        # entities of the same type
         for entity_type, entities in entities_by_type.items():
-            for i in range(len(entities) - 1):
-                for j in range(i + 1, len(entities)):
-                    relationship = EntityFactory.create_relationship(
-                        source_entity=entities[i].id,
-                        target_entity=entities[j].id,
-                        relationship_type="relatesTo",
-                        confidence=0.7,  # Fixed confidence for demonstration
-                        metadata={"extractor": "SimpleRuleBasedExtractor"}
-                    )
-                    
-                    # Record an observation
-                    ObservationRecorder.record_relationship_observation(
-                        relationship=relationship,
-                        source=source_id or "unknown",
-                        context=f"Both entities are of type {entity_type}",
-                        extractor="SimpleRuleBasedExtractor"
-                    )
-                    
-                    # Add the relationship to the collection
-                    collection.add_relationship(relationship)
+            self._relate_entities(
+                collection, entity_type, entities, source_id or "unknown", created_at
+            )
         
         return collection
+    
+    def _relate_entities(
+        self,
+        collection: EntityCollection,
+        entity_type: str,
+        entities: List[Entity],
+        source: str,
+        created_at: str
+    ) -> None:
+        """
+        Create "relatesTo" relationships between all pairs of entities.
+        
+        Pairs are enumerated with itertools.combinations. The work per pair is
+        building Python Relationship objects, so enumerating the pairs in
+        compiled code does not make this faster.
+        
+        Args:
+            collection: Entity collection to add relationships to.
+            entity_type: The type shared by the entities.
+            entities: The entities to relate.
+            source: The source of the observation (e.g., message ID).
+            created_at: Creation timestamp shared by all relationships.
+        """
+        pairs = itertools.combinations(entities, 2)
+        if self.max_pairs_per_type is not None:
+            pairs = itertools.islice(pairs, self.max_pairs_per_type)
+        
+        context = f"Both entities are of type {entity_type}"
+        relationships = [
+            self._relate_pair(source_entity, target_entity, context, source, created_at)
+            for source_entity, target_entity in pairs
+        ]
+        
+        # Add the relationships to the collection in one step
+        collection.add_relationships(relationships)
+    
+    @staticmethod
+    def _relate_pair(
+        source_entity: Entity,
+        target_entity: Entity,
+        context: str,
+        source: str,
+        created_at: str
+    ) -> Relationship:
+        """
+        Create a "relatesTo" relationship between two entities.
+        
+        Args:
+            source_entity: The source entity.
+            target_entity: The target entity.
+            context: The context in which the relationship was observed.
+            source: The source of the observation (e.g., message ID).
+            created_at: Creation timestamp of the relationship.
+            
+        Returns:
+            The relationship, with its observation recorded.
+        """
+        relationship = EntityFactory.create_relationship(
+            source_entity=source_entity.id,
+            target_entity=target_entity.id,
+            relationship_type="relatesTo",
+            confidence=0.7,  # Fixed confidence for demonstration
+            metadata={"extractor": "SimpleRuleBasedExtractor"},
+            created_at=created_at
+        )
+        
+        # Record an observation
+        ObservationRecorder.record_relationship_observation(
+            relationship=relationship,
+            source=source,
+            context=context,
+            extractor="SimpleRuleBasedExtractor",
+            created_at=created_at
+        )
+        return relationship
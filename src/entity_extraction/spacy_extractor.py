@@ -4,11 +4,17 @@ spaCy-based Entity Extractor Module
 This module provides entity extraction capabilities using the spaCy NLP library.
 """
 
+import functools
+import itertools
 import os
+import threading
+import numpy as np
 import spacy
-from typing import Dict, List, Any, Optional, Tuple
-import re
+from typing import Dict, Iterable, List, Any, Optional, Tuple
 import warnings
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from thinc.api import get_current_ops, set_current_ops
 
 from .base_extractor import (
     EntityExtractor, Entity, Relationship, EntityCollection,
@@ -16,6 +22,73 @@ from .base_extractor import (
 )
 
 
+# Serializes loads, so that concurrent callers cannot both miss the cache
+_MODEL_LOCK = threading.Lock()
+
+
+def _load_spacy_model(
+    model_name: str, exclude: Tuple[str, ...] = (), prefer_gpu: bool = False
+) -> spacy.language.Language:
+    """
+    Load a spaCy model, at most once per process.
+    
+    Extractors using the same model, excluded components and GPU preference
+    share the returned pipeline. A shared pipeline is safe to stream through
+    `nlp.pipe()`, but it must not be called directly (`nlp(text)`) from
+    several threads at once.
+    
+    Args:
+        model_name: Name of the spaCy model to load.
+        exclude: Names of pipeline components not to load.
+        prefer_gpu: Whether to load the pipeline onto a GPU when one is available.
+        
+    Returns:
+        The loaded spaCy pipeline.
+    """
+    with _MODEL_LOCK:
+        return _cached_spacy_model(model_name, exclude, prefer_gpu)
+
+
+@functools.lru_cache(maxsize=4)
+def _cached_spacy_model(
+    model_name: str, exclude: Tuple[str, ...], prefer_gpu: bool
+) -> spacy.language.Language:
+    """Load a spaCy model; only call through _load_spacy_model."""
+    if not prefer_gpu:
+        return spacy.load(model_name, exclude=list(exclude))
+    
+    # The pipeline keeps the ops it was created with, so switch to the GPU
+    # only while loading and leave later CPU loads in this thread alone
+    previous_ops = get_current_ops()
+    spacy.prefer_gpu()
+    try:
+        return spacy.load(model_name, exclude=list(exclude))
+    finally:
+        set_current_ops(previous_ops)
+
+
+# Relationship type implied by the lemma of a sentence's main verb
+_VERB_RELATIONSHIP_TYPES = {
+    "use": "uses",
+    "utilize": "uses",
+    "employ": "uses",
+    "work": "worksOn",
+    "collaborate": "worksOn",
+    "have": "has",
+    "own": "has",
+    "possess": "has",
+    "depend": "dependsOn",
+    "rely": "dependsOn",
+    "create": "creates",
+    "make": "creates",
+    "develop": "creates",
+    "build": "creates",
+}
+
+# Loads models in the background so constructing an extractor does not block
+_EXECUTOR = ThreadPoolExecutor(thread_name_prefix="spacy-model-loader")
+
+
 class SpacyEntityExtractor(EntityExtractor):
     """Entity extractor that uses spaCy for named entity recognition."""
     
@@ -40,111 +113,170 @@ class SpacyEntityExtractor(EntityExtractor):
         # Add more mappings as needed
     }
     
+    # Pipeline components the extractor does not use. NER needs "ner", and
+    # relationship extraction needs "parser" plus the tagger, attribute
+    # ruler and lemmatizer for verb POS tags and lemmas.
+    DEFAULT_DISABLED_COMPONENTS = ["senter", "textcat"]
+
+    # Base confidence per spaCy entity type (unknown types get 0.6).
+    # This is a simplified approach and could be improved.
+    _BASE_CONFIDENCE: Dict[str, float] = {
+        "PERSON": 0.85,
+        "ORG": 0.8,
+        "GPE": 0.85,
+        "LOC": 0.75,
+        "PRODUCT": 0.7,
+        "EVENT": 0.7,
+        "WORK_OF_ART": 0.65,
+        "LAW": 0.7,
+        "LANGUAGE": 0.8,
+        "DATE": 0.9,
+        "TIME": 0.9,
+        "MONEY": 0.9,
+        "QUANTITY": 0.85,
+        "PERCENT": 0.9,
+        "CARDINAL": 0.75,
+        "ORDINAL": 0.8,
+    }
+
     def __init__(
         self,
         model_name: str = "en_core_web_sm",
         entity_type_mapping: Optional[Dict[str, str]] = None,
         min_confidence: float = 0.5,
-        load_model: bool = True
+        load_model: bool = True,
+        disable_components: Optional[List[str]] = None,
+        prefer_gpu: bool = False
     ):
         """
         Initialize the spaCy-based entity extractor.
         
         Args:
-            model_name: Name of the spaCy model to use.
+            model_name: Name of the spaCy model to use. Any installed
+                pipeline works, including distilled or transformer ones;
+                distilled models trade little accuracy for much higher
+                throughput on batch workloads.
             entity_type_mapping: Mapping from spaCy entity types to our entity types.
             min_confidence: Minimum confidence threshold for entities.
-            load_model: Whether to load the model immediately.
+            load_model: Whether to start loading the model immediately. The
+                model loads in a background thread, and the first use of
+                `nlp` waits for it. A missing model that cannot be downloaded
+                only leaves `nlp` as None, but any other load error is raised
+                by that first use, usually the first extraction call.
+            disable_components: Pipeline components not to load (defaults to
+                DEFAULT_DISABLED_COMPONENTS). Add "parser" when only entities
+                are needed; relationships are then skipped.
+            prefer_gpu: Whether to run the pipeline on a GPU when one is
+                available. Mostly worthwhile for transformer pipelines.
         """
         self.model_name = model_name
         self.entity_type_mapping = entity_type_mapping or self.DEFAULT_ENTITY_TYPE_MAPPING
         self.min_confidence = min_confidence
-        self.nlp = None
+        self.disable_components = list(
+            self.DEFAULT_DISABLED_COMPONENTS if disable_components is None else disable_components
+        )
+        self.prefer_gpu = prefer_gpu
+        self._nlp = None
+        self._load_future = None
         
         # Load the model if requested
         if load_model:
-            self.load_model()
+            self._load_future = _EXECUTOR.submit(self._load_pipeline)
+    
+    @property
+    def nlp(self) -> Optional[spacy.language.Language]:
+        """
+        The spaCy pipeline, once a background load has finished.
+        
+        Waits for a pending background load and raises any error it hit.
+        """
+        future = self._load_future
+        if future is not None:
+            self._nlp = future.result()
+            self._load_future = None
+        return self._nlp
+    
+    @nlp.setter
+    def nlp(self, nlp: Optional[spacy.language.Language]) -> None:
+        self._load_future = None
+        self._nlp = nlp
     
     def load_model(self) -> None:
         """Load the spaCy model."""
+        self.nlp = self._load_pipeline()
+    
+    def _load_pipeline(self) -> Optional[spacy.language.Language]:
+        """
+        Load the spaCy model, downloading it if it is not installed.
+        
+        Returns:
+            The loaded pipeline, or None if it could not be loaded.
+        """
         try:
-            self.nlp = spacy.load(self.model_name)
+            return _load_spacy_model(
+                self.model_name, tuple(self.disable_components), self.prefer_gpu
+            )
         except OSError:
-            # If the model is not found, try downloading it
+            # If the model is not found, try downloading it in-process
             try:
-                os.system(f"python -m spacy download {self.model_name}")
-                self.nlp = spacy.load(self.model_name)
-            except Exception as e:
+                from spacy.cli.download import download
+                download(self.model_name)
+                return _load_spacy_model(
+                    self.model_name, tuple(self.disable_components), self.prefer_gpu
+                )
+            except (Exception, SystemExit) as e:  # download exits on failure
                 warnings.warn(f"Could not load or download spaCy model {self.model_name}: {e}")
-                self.nlp = None
+                return None
     
-    def _get_confidence_for_entity(self, ent: spacy.tokens.span.Span) -> float:
+    def _get_confidences(self, ents: Tuple[spacy.tokens.span.Span, ...]) -> np.ndarray:
         """
-        Calculate confidence score for a spaCy entity.
+        Calculate confidence scores for all entities of a document at once.
         
-        For now, we use a fixed confidence based on the entity type,
-        but this could be improved with a more sophisticated approach.
+        Each entity gets the base confidence of its type, scaled down for
+        very short entities, which might be less reliable. This is a
+        simplified approach and could be improved.
         
         Args:
-            ent: spaCy entity span.
+            ents: spaCy entity spans.
             
         Returns:
-            Confidence score between 0 and 1.
+            Array of confidence scores, aligned with `ents`.
         """
-        # Set base confidence based on entity type
-        # This is a simplified approach and could be improved
-        base_confidence = {
-            "PERSON": 0.85,
-            "ORG": 0.8,
-            "GPE": 0.85,
-            "LOC": 0.75,
-            "PRODUCT": 0.7,
-            "EVENT": 0.7,
-            "WORK_OF_ART": 0.65,
-            "LAW": 0.7,
-            "LANGUAGE": 0.8,
-            "DATE": 0.9,
-            "TIME": 0.9,
-            "MONEY": 0.9,
-            "QUANTITY": 0.85,
-            "PERCENT": 0.9,
-            "CARDINAL": 0.75,
-            "ORDINAL": 0.8,
-        }.get(ent.label_, 0.6)  # Default confidence for unknown types
-        
-        # Adjust confidence based on entity length
-        # Very short entities might be less reliable
-        length_factor = min(1.0, max(0.7, len(ent.text) / 5.0))
-        
-        return base_confidence * length_factor
+        base = self._BASE_CONFIDENCE
+        bases = np.fromiter(
+            (base.get(ent.label_, 0.6) for ent in ents), dtype=np.float64, count=len(ents)
+        )
+        lengths = np.fromiter(
+            (ent.end_char - ent.start_char for ent in ents), dtype=np.float64, count=len(ents)
+        )
+        # Entities shorter than five characters score down to 0.7 of the base
+        return bases * np.clip(lengths / 5.0, 0.7, 1.0)
     
-    def _get_context(
-        self, doc: spacy.tokens.doc.Doc, ent: spacy.tokens.span.Span
-    ) -> Tuple[str, str]:
+    def _get_context_bounds(
+        self,
+        ent: spacy.tokens.span.Span,
+        token_starts: List[int],
+        token_ends: List[int]
+    ) -> Tuple[int, int]:
         """
-        Get context before and after an entity.
+        Get the character range of the context around an entity.
         
         Args:
-            doc: spaCy document.
             ent: spaCy entity span.
+            token_starts: Character offset of each token of the document.
+            token_ends: Character offset just past each token, before any
+                trailing whitespace.
             
         Returns:
-            Tuple of (context_before, context_after).
+            Tuple of (context_start, context_end) offsets in the document text.
         """
-        # Get context window (up to 10 tokens or 50 characters on each side)
+        # Context window: up to 10 tokens, at most 50 characters, on each side
         before_start = max(0, ent.start - 10)
-        after_end = min(len(doc), ent.end + 10)
+        after_end = min(len(token_starts), ent.end + 10)
         
-        context_before = doc[before_start:ent.start].text
-        context_after = doc[ent.end:after_end].text
-        
-        # Limit context to reasonable length
-        if len(context_before) > 50:
-            context_before = "..." + context_before[-50:]
-        if len(context_after) > 50:
-            context_after = context_after[:50] + "..."
-        
-        return context_before, context_after
+        context_start = max(token_starts[before_start], ent.start_char - 50)
+        context_end = min(token_ends[after_end - 1], ent.end_char + 50)
+        return context_start, context_end
     
     def extract_entities(self, text: str, **kwargs) -> EntityCollection:
         """
@@ -154,40 +286,114 @@ class SpacyEntityExtractor(EntityExtractor):
             text: The text to extract entities from.
             **kwargs: Additional parameters.
                 source_id: Optional source identifier.
+                created_at: Optional timestamp shared by everything extracted.
                 
         Returns:
             A collection of extracted entities and relationships.
         """
+        return self.extract_entities_batch(
+            [text], source_ids=[kwargs.pop("source_id", None)], **kwargs
+        )[0]
+    
+    def extract_entities_batch(
+        self,
+        texts: Iterable[str],
+        source_ids: Optional[Iterable[Optional[str]]] = None,
+        **kwargs
+    ) -> List[EntityCollection]:
+        """
+        Extract entities from several texts using spaCy's batched nlp.pipe.
+        
+        Args:
+            texts: The texts to extract entities from.
+            source_ids: Optional source identifier for each text, one per text.
+            **kwargs: Additional parameters.
+                source_id: Source identifier for every text, if source_ids
+                    is not given.
+                created_at: Optional timestamp shared by everything extracted.
+                batch_size: Number of texts spaCy processes per batch
+                    (defaults to the SPACY_BATCH_SIZE environment variable, or 64).
+                n_process: Number of worker processes (default 1).
+                disable: Pipeline components to skip. Relationship extraction
+                    needs the parser and the tagger/lemmatizer, so only disable
+                    those when relationships are not wanted.
+                
+        Returns:
+            One collection of extracted entities and relationships per text.
+        """
+        if source_ids is None:
+            inputs = zip(texts, itertools.repeat(kwargs.get("source_id")))
+        else:
+            inputs = zip(texts, source_ids, strict=True)
+        
         # Check if the model is loaded
+        if not self._ensure_model():
+            warnings.warn("Could not load spaCy model, returning empty collections")
+            return [EntityCollection(source_id=source_id) for _, source_id in inputs]
+        
+        created_at = kwargs.get("created_at") or datetime.now().isoformat()
+        batch_size = kwargs.get("batch_size") or int(os.environ.get("SPACY_BATCH_SIZE", 64))
+        
+        # Process all texts with spaCy in batches, carrying each source ID along
+        docs = self.nlp.pipe(
+            inputs,
+            as_tuples=True,
+            batch_size=batch_size,
+            n_process=kwargs.get("n_process", 1),
+            disable=kwargs.get("disable", [])
+        )
+        
+        return [self._process_doc(doc, source_id, created_at) for doc, source_id in docs]
+    
+    def _ensure_model(self) -> bool:
+        """
+        Load the model if it has not been loaded yet.
+        
+        Returns:
+            Whether the model is available.
+        """
         if self.nlp is None:
             self.load_model()
-            if self.nlp is None:
-                warnings.warn("Could not load spaCy model, returning empty collection")
-                return EntityCollection(source_id=kwargs.get("source_id"))
-        
-        # Process the text with spaCy
-        doc = self.nlp(text)
+        return self.nlp is not None
+    
+    def _process_doc(
+        self, doc: spacy.tokens.doc.Doc, source_id: Optional[str], created_at: str
+    ) -> EntityCollection:
+        """
+        Build an entity collection from a processed spaCy document.
         
+        Args:
+            doc: spaCy document.
+            source_id: Optional source identifier.
+            created_at: Creation timestamp shared by everything extracted.
+            
+        Returns:
+            A collection of extracted entities and relationships.
+        """
         # Create the entity collection
-        collection = EntityCollection(source_id=kwargs.get("source_id"))
+        collection = EntityCollection(source_id=source_id)
         
         # Extract entities
-        for ent in doc.ents:
+        ents = doc.ents
+        confidences = self._get_confidences(ents)
+        
+        # Token boundaries for the context windows, computed once per doc
+        text = doc.text
+        token_starts = [token.idx for token in doc] if ents else []
+        token_ends = [start + len(token) for start, token in zip(token_starts, doc)]
+        for ent, confidence in zip(ents, confidences.tolist()):
             # Map spaCy entity type to our entity type
             if ent.label_ not in self.entity_type_mapping:
                 continue  # Skip entities with unmapped types
             
             entity_type = self.entity_type_mapping[ent.label_]
             
-            # Calculate confidence
-            confidence = self._get_confidence_for_entity(ent)
-            
             # Skip entities with low confidence
             if confidence < self.min_confidence:
                 continue
             
             # Get context
-            context_before, context_after = self._get_context(doc, ent)
+            context_bounds = self._get_context_bounds(ent, token_starts, token_ends)
             
             # Create the entity
             entity = EntityFactory.create_entity(
@@ -197,28 +403,34 @@ class SpacyEntityExtractor(EntityExtractor):
                 start_position=ent.start_char,
                 end_position=ent.end_char,
                 confidence=confidence,
-                metadata={"spacy_type": ent.label_}
+                metadata={"spacy_type": ent.label_},
+                created_at=created_at
             )
             
             # Record the observation
             ObservationRecorder.record_entity_observation(
                 entity=entity,
-                source=kwargs.get("source_id", "unknown"),
-                context_before=context_before,
-                context_after=context_after,
-                extractor=f"SpacyEntityExtractor({self.model_name})"
+                source=source_id or "unknown",
+                extractor=f"SpacyEntityExtractor({self.model_name})",
+                created_at=created_at,
+                text=text,
+                context_bounds=context_bounds
             )
             
             # Add the entity to the collection
             collection.add_entity(entity)
         
         # Extract relationships based on syntactic dependencies
-        self._extract_relationships(doc, collection, kwargs.get("source_id", "unknown"))
+        self._extract_relationships(doc, collection, source_id or "unknown", created_at)
         
         return collection
     
     def _extract_relationships(
-        self, doc: spacy.tokens.doc.Doc, collection: EntityCollection, source_id: str
+        self,
+        doc: spacy.tokens.doc.Doc,
+        collection: EntityCollection,
+        source_id: str,
+        created_at: Optional[str] = None
     ) -> None:
         """
         Extract relationships between entities based on syntactic dependencies.
@@ -227,26 +439,43 @@ class SpacyEntityExtractor(EntityExtractor):
             doc: spaCy document.
             collection: Entity collection to add relationships to.
             source_id: Source identifier.
+            created_at: Creation timestamp shared by all relationships.
         """
-        # Create a mapping from token spans to entity IDs
-        span_to_entity = {}
+        # Relationships come from the dependency parse and need two entities
+        if len(collection.entities) < 2 or not doc.has_annotation("DEP"):
+            return
+        
+        # Map each character offset to the index of the token covering it
+        token_of_char: List[Optional[int]] = [None] * len(doc.text)
+        for token in doc:
+            token_of_char[token.idx:token.idx + len(token)] = [token.i] * len(token)
+        
+        # Map each token to the ID of the entity covering it
+        token_to_entity_id: List[Optional[str]] = [None] * len(doc)
         for entity in collection.entities:
-            start_token = None
-            end_token = None
-            
-            # Find the token span that corresponds to the entity
-            for i, token in enumerate(doc):
-                if token.idx == entity.start_position:
-                    start_token = i
-                if token.idx + len(token.text) == entity.end_position:
-                    end_token = i + 1
-                    break
+            if not 0 <= entity.start_position < entity.end_position <= len(doc.text):
+                continue
+            start_token = token_of_char[entity.start_position]
+            end_token = token_of_char[entity.end_position - 1]
             
-            if start_token is not None and end_token is not None:
-                span_to_entity[(start_token, end_token)] = entity.id
+            # Only map entities whose boundaries line up with token boundaries
+            if (
+                start_token is not None and end_token is not None and
+                doc[start_token].idx == entity.start_position and
+                doc[end_token].idx + len(doc[end_token]) == entity.end_position
+            ):
+                for i in range(start_token, end_token + 1):
+                    if token_to_entity_id[i] is None:
+                        token_to_entity_id[i] = entity.id
         
         # Look for verb-mediated relationships between entities
         for sent in doc.sents:
+            # Skip sentences that mention fewer than two entities
+            sent_entity_ids = set(token_to_entity_id[sent.start:sent.end])
+            sent_entity_ids.discard(None)
+            if len(sent_entity_ids) < 2:
+                continue
+            
             # Find the main verb of the sentence
             main_verb = None
             for token in sent:
@@ -265,36 +494,24 @@ class SpacyEntityExtractor(EntityExtractor):
                 # Check for subject
                 if token.dep_ in ["nsubj", "nsubjpass"] and token.head == main_verb:
                     # Find the entity that contains this token
-                    for (start, end), entity_id in span_to_entity.items():
-                        if start <= token.i < end:
-                            subject_entity = entity_id
-                            break
+                    entity_id = token_to_entity_id[token.i]
+                    if entity_id is not None:
+                        subject_entity = entity_id
                 
                 # Check for object
                 if token.dep_ in ["dobj", "pobj"] and (token.head == main_verb or 
                                                    (token.head.dep_ == "prep" and token.head.head == main_verb)):
                     # Find the entity that contains this token
-                    for (start, end), entity_id in span_to_entity.items():
-                        if start <= token.i < end:
-                            object_entity = entity_id
-                            break
+                    entity_id = token_to_entity_id[token.i]
+                    if entity_id is not None:
+                        object_entity = entity_id
             
             # If we found both subject and object entities, create a relationship
             if subject_entity and object_entity:
                 # Determine relationship type based on the verb
-                relationship_type = "relatesTo"  # Default type
-                
-                verb_lemma = main_verb.lemma_.lower()
-                if verb_lemma in ["use", "utilize", "employ"]:
-                    relationship_type = "uses"
-                elif verb_lemma in ["work", "collaborate"]:
-                    relationship_type = "worksOn"
-                elif verb_lemma in ["have", "own", "possess"]:
-                    relationship_type = "has"
-                elif verb_lemma in ["depend", "rely"]:
-                    relationship_type = "dependsOn"
-                elif verb_lemma in ["create", "make", "develop", "build"]:
-                    relationship_type = "creates"
+                relationship_type = _VERB_RELATIONSHIP_TYPES.get(
+                    main_verb.lemma_.lower(), "relatesTo"  # Default type
+                )
                 
                 # Create the relationship
                 relationship = EntityFactory.create_relationship(
@@ -302,7 +519,8 @@ class SpacyEntityExtractor(EntityExtractor):
                     target_entity=object_entity,
                     relationship_type=relationship_type,
                     confidence=0.7,  # Base confidence for syntactic relationships
-                    metadata={"verb": main_verb.text, "sentence": sent.text}
+                    metadata={"verb": main_verb.text, "sentence": sent.text},
+                    created_at=created_at
                 )
                 
                 # Record the observation
@@ -310,7 +528,8 @@ class SpacyEntityExtractor(EntityExtractor):
                     relationship=relationship,
                     source=source_id,
                     context=sent.text,
-                    extractor=f"SpacyEntityExtractor({self.model_name})"
+                    extractor=f"SpacyEntityExtractor({self.model_name})",
+                    created_at=created_at
                 )
                 
                 # Add the relationship to the collection
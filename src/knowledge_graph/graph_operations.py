@@ -1,46 +1,212 @@
 """Knowledge graph operations."""
 
+from array import array
+
+import numpy as np
+
+
 class KnowledgeGraph:
-    """Operations for managing the knowledge graph."""
-    
+    """Operations for managing the knowledge graph.
+
+    Entities are stored column-wise: an entity's position indexes parallel
+    columns for its data, name and type code. Relations are buffered as
+    they are added and packed into a compressed sparse row (CSR) adjacency
+    on the first query after a change, so the neighbours of an entity are
+    one contiguous slice of `csr_indices`. Relations are traversed in both
+    directions.
+    """
+
     def __init__(self):
         """Initialize the knowledge graph."""
-        self.graph = {}
-        
+        # Entity columns, indexed by entity position
+        self.entities = []
+        self.entities_name = []
+        self._entities_type = array("h")
+        self._id_to_idx = {}
+        self._type_to_code = {}
+        self._relation_type_to_code = {}
+
+        # Relations added since the graph was created, as parallel columns
+        self._edge_source = array("i")
+        self._edge_target = array("i")
+        self._edge_type = array("h")
+
+        # CSR adjacency over both directions of every relation
+        self.csr_indptr = np.zeros(1, dtype=np.int32)
+        self.csr_indices = np.empty(0, dtype=np.int32)
+        self.csr_rel_type = np.empty(0, dtype=np.int16)
+        self._csr_edges = 0
+
+    @property
+    def entities_type(self):
+        """np.ndarray: The type code of each entity, by entity position."""
+        # A copy, since a live view would stop the column from growing
+        return np.array(self._entities_type, dtype=np.int16)
+
     def add_entity(self, entity):
         """Add an entity to the knowledge graph.
-        
+
         Args:
-            entity (dict): The entity to add
-            
+            entity (dict): The entity to add, with at least an "id" key
+
         Returns:
-            bool: Success status
+            bool: Success status (False if the ID is missing or already used)
         """
-        # Placeholder for entity addition implementation
+        entity_id = entity.get("id")
+        if entity_id is None or entity_id in self._id_to_idx:
+            return False
+
+        entity_type = entity.get("type")
+        code = self._type_to_code.setdefault(entity_type, len(self._type_to_code))
+
+        self._id_to_idx[entity_id] = len(self.entities)
+        self.entities.append(entity)
+        self.entities_name.append(entity.get("name"))
+        self._entities_type.append(code)
         return True
-        
+
     def add_relation(self, from_entity, to_entity, relation_type):
         """Add a relation between entities.
-        
+
         Args:
             from_entity (str): Source entity ID
             to_entity (str): Target entity ID
             relation_type (str): Type of relation
-            
+
         Returns:
-            bool: Success status
+            bool: Success status (False if either entity does not exist)
         """
-        # Placeholder for relation addition implementation
+        source_idx = self._id_to_idx.get(from_entity)
+        target_idx = self._id_to_idx.get(to_entity)
+        if source_idx is None or target_idx is None:
+            return False
+
+        code = self._relation_type_to_code.setdefault(
+            relation_type, len(self._relation_type_to_code)
+        )
+        self._edge_source.append(source_idx)
+        self._edge_target.append(target_idx)
+        self._edge_type.append(code)
         return True
-        
+
+    def _build_csr(self):
+        """Pack the buffered relations into the CSR adjacency if it is stale."""
+        n_entities = len(self.entities)
+        if self._csr_edges == len(self._edge_source) and len(self.csr_indptr) == n_entities + 1:
+            return
+
+        source = np.frombuffer(self._edge_source, dtype=np.intc)
+        target = np.frombuffer(self._edge_target, dtype=np.intc)
+        relation_type = np.frombuffer(self._edge_type, dtype=np.int16)
+
+        # Store each relation once from each end, grouped by the entity it
+        # leaves from
+        rows = np.concatenate((source, target))
+        order = np.argsort(rows, kind="stable")
+        self.csr_indices = np.concatenate((target, source))[order]
+        self.csr_rel_type = np.concatenate((relation_type, relation_type))[order]
+
+        self.csr_indptr = np.zeros(n_entities + 1, dtype=np.int32)
+        np.cumsum(np.bincount(rows, minlength=n_entities), out=self.csr_indptr[1:])
+        self._csr_edges = len(source)
+
+    def _neighbors(self, frontier, relation_code=None):
+        """Get the neighbours of a set of entities.
+
+        Args:
+            frontier (np.ndarray): Positions of the entities to expand
+            relation_code (int): Only follow relations of this type code
+
+        Returns:
+            np.ndarray: Positions of the neighbours, possibly repeated
+        """
+        starts = self.csr_indptr[frontier]
+        lengths = self.csr_indptr[frontier + 1] - starts
+        total = int(lengths.sum())
+        if not total:
+            return np.empty(0, dtype=np.int32)
+
+        # Positions of all the CSR slices, laid end to end
+        offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        positions = offsets + np.arange(total)
+        neighbors = self.csr_indices[positions]
+        if relation_code is not None:
+            neighbors = neighbors[self.csr_rel_type[positions] == relation_code]
+        return neighbors
+
+    def _related(self, entity_idx, depth, relation_code=None):
+        """Find the entities reachable from an entity.
+
+        Args:
+            entity_idx (int): Position of the starting entity
+            depth (int): Maximum number of relations to follow
+            relation_code (int): Only follow relations of this type code
+
+        Returns:
+            np.ndarray: Boolean mask of the reachable entities, excluding
+                the starting entity
+        """
+        self._build_csr()
+        reached = np.zeros(len(self.entities), dtype=bool)
+        reached[entity_idx] = True
+        frontier = np.array([entity_idx], dtype=np.int32)
+
+        for _ in range(depth):
+            neighbors = self._neighbors(frontier, relation_code)
+            frontier = np.unique(neighbors[~reached[neighbors]])
+            if not len(frontier):
+                break
+            reached[frontier] = True
+
+        reached[entity_idx] = False
+        return reached
+
     def query_graph(self, query):
         """Query the knowledge graph.
-        
+
+        Supported query keys:
+            id: Get the entity with this ID
+            related_to: Get the entities related to the entity with this ID
+            relation_type: Only follow relations of this type (with related_to)
+            depth: Maximum number of relations to follow (with related_to,
+                defaults to 1)
+            name: Only return entities with this name
+            type: Only return entities of this type
+
         Args:
             query (dict): Query parameters
-            
+
         Returns:
-            dict: Query results
+            dict: Query results, as a list of entities under "results"
         """
-        # Placeholder for query implementation
-        return {"results": []}
+        if "id" in query:
+            entity_idx = self._id_to_idx.get(query["id"])
+            return {"results": [] if entity_idx is None else [self.entities[entity_idx]]}
+
+        mask = np.ones(len(self.entities), dtype=bool)
+
+        if "related_to" in query:
+            entity_idx = self._id_to_idx.get(query["related_to"])
+            relation_code = None
+            if "relation_type" in query:
+                relation_code = self._relation_type_to_code.get(query["relation_type"])
+                if relation_code is None:
+                    return {"results": []}
+            if entity_idx is None:
+                return {"results": []}
+            mask = self._related(entity_idx, query.get("depth", 1), relation_code)
+
+        if "type" in query:
+            code = self._type_to_code.get(query["type"])
+            if code is None:
+                return {"results": []}
+            mask &= np.frombuffer(self._entities_type, dtype=np.int16) == code
+
+        if "name" in query:
+            mask &= np.fromiter(
+                (name == query["name"] for name in self.entities_name),
+                dtype=bool,
+                count=len(self.entities_name)
+            )
+
+        return {"results": [self.entities[i] for i in np.flatnonzero(mask)]}
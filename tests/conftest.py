@@ -0,0 +1,10 @@
+"""Shared pytest configuration."""
+
+import pathlib
+import sys
+
+# Make the repository root importable once per session, so tests can
+# import from the src package
+ROOT = str(pathlib.Path(__file__).resolve().parents[1])
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
@@ -1,6 +1,44 @@
 """Tests for the knowledge graph module."""
 
+from src.knowledge_graph.graph_operations import KnowledgeGraph
+
+
 def test_knowledge_graph_operations():
     """Test basic knowledge graph operations."""
-    # Placeholder for knowledge graph tests
-    assert True
+    graph = KnowledgeGraph()
+    for entity_id, name, entity_type in [
+        ("p1", "Omar", "Person"),
+        ("p2", "Alice", "Person"),
+        ("o1", "Google", "Organization"),
+        ("t1", "Python", "Technology"),
+    ]:
+        assert graph.add_entity({"id": entity_id, "name": name, "type": entity_type})
+    
+    # IDs must be unique, and relations need both entities to exist
+    assert not graph.add_entity({"id": "p1", "name": "Omar", "type": "Person"})
+    assert not graph.add_relation("p1", "missing", "uses")
+    
+    assert graph.add_relation("p1", "t1", "uses")
+    assert graph.add_relation("p1", "o1", "worksFor")
+    assert graph.add_relation("p2", "o1", "worksFor")
+    
+    def ids(query):
+        return [entity["id"] for entity in graph.query_graph(query)["results"]]
+    
+    assert ids({"id": "o1"}) == ["o1"]
+    assert ids({"id": "missing"}) == []
+    assert ids({"type": "Person"}) == ["p1", "p2"]
+    assert ids({"name": "Alice", "type": "Person"}) == ["p2"]
+    
+    # Relations are followed in both directions
+    assert ids({"related_to": "p1"}) == ["o1", "t1"]
+    assert ids({"related_to": "o1"}) == ["p1", "p2"]
+    assert ids({"related_to": "p1", "relation_type": "uses"}) == ["t1"]
+    assert ids({"related_to": "p1", "depth": 2}) == ["p2", "o1", "t1"]
+    assert ids({"related_to": "p1", "depth": 2, "type": "Person"}) == ["p2"]
+    assert ids({"related_to": "p1", "relation_type": "unknown"}) == []
+    
+    # Entities and relations added after a query are picked up
+    assert graph.add_entity({"id": "t2", "name": "spaCy", "type": "Technology"})
+    assert graph.add_relation("t2", "t1", "dependsOn")
+    assert ids({"related_to": "t1"}) == ["p1", "t2"]
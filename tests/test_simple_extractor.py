@@ -1,14 +1,15 @@
 """Tests for the simple rule-based entity extractor."""
 
-import sys
-import os
+import io
+import itertools
+import json
 import pytest
 from typing import Dict, List
 
-# Add the src directory to the path so we can import our modules
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-
-from src.entity_extraction.base_extractor import SimpleRuleBasedExtractor, EntityCollection
+from src.entity_extraction.base_extractor import (
+    SimpleRuleBasedExtractor, CompositeEntityExtractor, Entity, EntityCollection,
+    EntityObservation
+)
 
 
 def test_simple_rule_based_extractor():
@@ -121,6 +122,13 @@ def test_entity_collection_methods():
     assert retrieved_entity is not None
     assert retrieved_entity.id == first_entity.id
     
+    # Observations reference the source text but leave it out of their repr
+    assert test_text not in repr(collection)
+    
+    # Entities and relationships are slotted, without a per-instance __dict__
+    assert not hasattr(first_entity, "__dict__")
+    assert not hasattr(collection.relationships[0], "__dict__")
+    
     # Test get_entities_by_type
     person_entities = collection.get_entities_by_type("Person")
     assert len(person_entities) == 3  # Omar, John, Alice
@@ -131,10 +139,14 @@ def test_entity_collection_methods():
     # Test get_relationships_by_type
     relates_to_relationships = collection.get_relationships_by_type("relatesTo")
     assert len(relates_to_relationships) == len(collection.relationships)
+    assert collection.get_relationships_by_type("worksFor") == []
     
     # Test get_relationships_for_entity
-    omar_entity = next((e for e in collection.entities if e.name == "Omar"), None)
-    assert omar_entity is not None
+    # Test get_entities_by_name
+    omar_entities = collection.get_entities_by_name("Omar")
+    assert len(omar_entities) == 1
+    assert collection.get_entities_by_name("Bob") == []
+    omar_entity = omar_entities[0]
     
     omar_relationships = collection.get_relationships_for_entity(omar_entity.id)
     assert len(omar_relationships) == 2  # Relationships with John and Alice
@@ -150,10 +162,169 @@ def test_entity_collection_methods():
     original_ids = {entity.id for entity in collection.entities}
     reconstructed_ids = {entity.id for entity in reconstructed_collection.entities}
     assert original_ids == reconstructed_ids
+    
+    # Check that the JSON output matches the dictionary form
+    assert json.loads(collection.to_json()) == collection_dict
+    assert EntityCollection.from_json(collection.to_json_bytes()).to_dict() == collection_dict
+    
+    # Check that the streamed JSON output is the same document
+    stream = io.BytesIO()
+    collection.write_json(stream)
+    assert stream.getvalue().decode() == collection.to_json()
+
+
+def test_round_trip_preserves_equality():
+    """Test that collections equal their round-tripped copies for long texts."""
+    extractor = SimpleRuleBasedExtractor({"Person": ["Omar", "John"]})
+    
+    # Pad the text so the context windows do not cover all of it
+    text = "x" * 80 + " Omar and John met. " + "y" * 80
+    collection = extractor.extract_entities(text, source_id="test_message_4")
+    
+    entity = collection.entities[0]
+    assert Entity.from_dict(entity.to_dict()) == entity
+    assert EntityCollection.from_dict(collection.to_dict()) == collection
+    assert EntityCollection.from_json(collection.to_json()) == collection
+    
+    observation = entity.metadata["observations"][0]
+    copied = EntityObservation.from_dict(observation.to_dict())
+    assert copied == observation
+    assert not copied != observation
+    assert hash(copied) == hash(observation)
+
+
+def test_entity_collection_index_follows_direct_changes():
+    """Test that lookups see entities and relationships changed directly."""
+    extractor = SimpleRuleBasedExtractor({"Person": ["Omar", "John"], "Technology": ["Python"]})
+    collection = extractor.extract_entities("Omar and John use Python.")
+    other = extractor.extract_entities("John.")
+    
+    # Same-length changes: reordering and replacing an entity
+    collection.entities = list(reversed(collection.entities))
+    assert [entity.name for entity in collection.get_entities_by_type("Person")] == ["John", "Omar"]
+    python_entity = collection.entities[0]
+    collection.entities[0] = other.entities[0]
+    assert collection.get_entity_by_id(other.entities[0].id) is other.entities[0]
+    assert collection.get_entity_by_id(python_entity.id) is None
+    assert len(collection.get_entities_by_name("John")) == 2
+    assert collection.get_entities_by_type("Technology") == []
+    collection.entities[0] = python_entity
+    collection.entities.reverse()
+    
+    collection.entities.extend(other.entities)
+    assert collection.get_entity_by_id(other.entities[0].id) is other.entities[0]
+    assert len(collection.get_entities_by_type("Person")) == 3
+    assert len(collection.get_entities_by_name("John")) == 2
+    
+    collection.entities = collection.entities[:1]
+    assert collection.get_entity_by_id(other.entities[0].id) is None
+    assert [entity.name for entity in collection.get_entities_by_type("Person")] == ["Omar"]
+    assert collection.get_entities_by_name("John") == []
+    assert collection.get_entities_by_type("Technology") == []
+    
+    relationship = collection.relationships[0]
+    works_for = extractor.extract_entities("Omar and John.").relationships[0]
+    works_for.type = "worksFor"
+    collection.relationships[0] = works_for
+    assert collection.get_relationships_by_type("relatesTo") == []
+    assert collection.get_relationships_by_type("worksFor") == [works_for]
+    
+    collection.relationships = []
+    assert collection.get_relationships_by_type("relatesTo") == []
+    collection.relationships.append(relationship)
+    assert collection.get_relationships_by_type("relatesTo") == [relationship]
+
+
+def test_max_pairs_per_type():
+    """Test that max_pairs_per_type bounds the relationships per entity type."""
+    patterns = {"Person": ["Omar", "John", "Alice", "Bob"]}
+    text = "Omar, John, Alice and Bob."
+    
+    unbounded = SimpleRuleBasedExtractor(patterns).extract_entities(text)
+    assert len(unbounded.relationships) == 6
+    
+    bounded = SimpleRuleBasedExtractor(patterns, max_pairs_per_type=2).extract_entities(text)
+    assert len(bounded.entities) == 4
+    assert len(bounded.relationships) == 2
+    
+    none = SimpleRuleBasedExtractor(patterns, max_pairs_per_type=0).extract_entities(text)
+    assert none.relationships == []
+    
+    with pytest.raises(ValueError):
+        SimpleRuleBasedExtractor(patterns, max_pairs_per_type=-1)
+
 
+def test_overlapping_matches_keep_longest():
+    """Test that overlapping pattern matches keep only the longest span."""
+    patterns = {
+        "Person": ["Omar"],
+        "Technology": ["Node", "Node.js"]
+    }
+    
+    extractor = SimpleRuleBasedExtractor(patterns)
+    collection = extractor.extract_entities("Omar uses Node.js, not Node.")
+    
+    found = [(entity.name, entity.start_position) for entity in collection.entities]
+    assert found == [("Omar", 0), ("Node.js", 10), ("Node", 23)]
+
+
+def test_matches_respect_word_boundaries():
+    """Test that patterns only match whole words."""
+    patterns = {"Technology": ["Java", "JS", "Node", "Node.js", ".NET"]}
+    
+    extractor = SimpleRuleBasedExtractor(patterns)
+    collection = extractor.extract_entities("JavaScript, Java, JSON, Node.jsx and .NET.")
+    
+    found = [(entity.name, entity.start_position) for entity in collection.entities]
+    assert found == [("Java", 12), ("Node", 24), (".NET", 37)]
+
+
+def test_composite_extractor_deduplicates():
+    """Test that the CompositeEntityExtractor merges duplicate entities."""
+    first = SimpleRuleBasedExtractor({"Person": ["Omar"], "Technology": ["Python"]})
+    second = SimpleRuleBasedExtractor({"Person": ["Omar"]})
+    
+    composite = CompositeEntityExtractor([first, second])
+    collection = composite.extract_entities("Omar uses Python.", source_id="test_message_3")
+    
+    found = sorted((entity.name, entity.type) for entity in collection.entities)
+    assert found == [("Omar", "Person"), ("Python", "Technology")]
+
+
+def test_extract_entities_batch():
+    """Test that batch extraction returns one collection per text."""
+    extractor = SimpleRuleBasedExtractor({"Person": ["Omar", "John"]})
+    composite = CompositeEntityExtractor([extractor])
+    texts = ["Omar and John.", "No one here.", "John again."]
+    
+    for batch_extractor in (extractor, composite):
+        collections = batch_extractor.extract_entities_batch(texts, source_id="batch")
+        assert len(collections) == len(texts)
+        assert [len(c.entities) for c in collections] == [2, 0, 1]
+        assert [len(c.relationships) for c in collections] == [1, 0, 0]
+        
+        collections = batch_extractor.extract_entities_batch(texts, source_ids=["a", "b", "c"])
+        assert [len(c.entities) for c in collections] == [2, 0, 1]
+        assert [c.source_id for c in collections] == ["a", "b", "c"]
+        
+        with pytest.raises(ValueError):
+            batch_extractor.extract_entities_batch(texts, source_ids=["a"])
+    
+    collections = CompositeEntityExtractor([]).extract_entities_batch(texts, source_ids=["a", "b", "c"])
+    assert [(c.source_id, c.entities) for c in collections] == [("a", []), ("b", []), ("c", [])]
+
+
+def test_relationship_pairs_follow_combinations():
+    """Test that same-type relationships are made in itertools.combinations order."""
+    names = ["Omar", "John", "Alice", "Bob"]
+    collection = SimpleRuleBasedExtractor({"Person": names}).extract_entities(
+        "Omar, John, Alice and Bob."
+    )
+    
+    found = [
+        (collection.get_entity_by_id(relationship.source_entity).name,
+         collection.get_entity_by_id(relationship.target_entity).name)
+        for relationship in collection.relationships
+    ]
+    assert found == list(itertools.combinations(names, 2))
 
-if __name__ == "__main__":
-    # Run the tests
-    test_simple_rule_based_extractor()
-    test_entity_collection_methods()
-    print("All tests passed!")
@@ -0,0 +1,181 @@
+"""Tests for the spaCy-based entity extractor."""
+
+import threading
+
+import pytest
+import spacy
+from spacy.tokens import Doc
+
+from src.entity_extraction import spacy_extractor
+from src.entity_extraction.spacy_extractor import SpacyEntityExtractor
+
+
+@pytest.fixture(scope="module")
+def model_path(tmp_path_factory):
+    """A small pipeline on disk: a blank English model with an entity ruler."""
+    nlp = spacy.blank("en")
+    ruler = nlp.add_pipe("entity_ruler")
+    ruler.add_patterns([
+        {"label": "PERSON", "pattern": "Omar"},
+        {"label": "PERSON", "pattern": "Alice"},
+        {"label": "ORG", "pattern": "Google"},
+        {"label": "LANGUAGE", "pattern": "Python"},
+    ])
+    path = tmp_path_factory.mktemp("models") / "ruler_model"
+    nlp.to_disk(path)
+    return str(path)
+
+
+@pytest.fixture(autouse=True)
+def empty_model_cache():
+    """Give each test its own spaCy model cache."""
+    spacy_extractor._cached_spacy_model.cache_clear()
+    yield
+    spacy_extractor._cached_spacy_model.cache_clear()
+
+
+def make_doc(words, heads, deps, pos, ents):
+    """Build a parsed document by hand; "uses" is lemmatized, other words are their own lemma."""
+    lemmas = ["use" if word == "uses" else word for word in words]
+    return Doc(
+        spacy.blank("en").vocab, words=words, heads=heads, deps=deps,
+        pos=pos, lemmas=lemmas, ents=ents
+    )
+
+
+def test_extract_entities_batch(model_path):
+    """Test that batch extraction keeps texts and source IDs together."""
+    extractor = SpacyEntityExtractor(model_name=model_path)
+    texts = ["Omar works at Google.", "Nothing here.", "Alice writes Python."]
+    
+    collections = extractor.extract_entities_batch(texts, source_ids=["a", "b", "c"], batch_size=2)
+    assert [c.source_id for c in collections] == ["a", "b", "c"]
+    assert [[(e.name, e.type) for e in c.entities] for c in collections] == [
+        [("Omar", "Person"), ("Google", "Organization")],
+        [],
+        [("Alice", "Person"), ("Python", "Technology")],
+    ]
+    
+    # Every observation names the text it was made in
+    observation = collections[2].entities[1].metadata["observations"][0]
+    assert observation.source == "c"
+    assert observation.exact == "Python"
+    
+    # Without a parser there are no relationships
+    assert all(c.relationships == [] for c in collections)
+    
+    collections = extractor.extract_entities_batch(texts, source_id="shared")
+    assert [c.source_id for c in collections] == ["shared"] * 3
+    
+    collection = extractor.extract_entities("Omar uses Python.", source_id="single")
+    assert collection.source_id == "single"
+    assert [e.name for e in collection.entities] == ["Omar", "Python"]
+    
+    with pytest.raises(ValueError):
+        extractor.extract_entities_batch(texts, source_ids=["a"])
+
+
+def test_model_is_loaded_once(model_path, monkeypatch):
+    """Test that extractors loading the same model concurrently share it."""
+    calls = []
+    load = spacy.load
+    
+    def counting_load(*args, **kwargs):
+        calls.append(args)
+        return load(*args, **kwargs)
+    
+    monkeypatch.setattr(spacy, "load", counting_load)
+    
+    # Constructing extractors starts their loads in the background
+    extractors = [SpacyEntityExtractor(model_name=model_path) for _ in range(4)]
+    pipelines = [extractor.nlp for extractor in extractors]
+    assert len(calls) == 1
+    assert all(nlp is pipelines[0] for nlp in pipelines)
+    
+    # Loads from several threads also share one pipeline
+    threads = [
+        threading.Thread(target=SpacyEntityExtractor(model_name=model_path).load_model)
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    
+    # Excluding other components loads a separate pipeline
+    other = SpacyEntityExtractor(model_name=model_path, disable_components=["entity_ruler"])
+    assert other.nlp is not pipelines[0]
+    assert other.nlp.pipe_names == []
+    assert len(calls) == 2
+
+
+def test_model_loads_on_first_use(model_path):
+    """Test that an extractor created without loading loads on first use."""
+    extractor = SpacyEntityExtractor(model_name=model_path, load_model=False)
+    assert extractor.nlp is None
+    
+    collection = extractor.extract_entities("Omar.")
+    assert [e.name for e in collection.entities] == ["Omar"]
+    assert extractor.nlp is not None
+
+
+def test_context_bounds(model_path):
+    """Test that context windows stop at 10 tokens or 50 characters."""
+    extractor = SpacyEntityExtractor(model_name=model_path)
+    
+    # Short tokens before the entity, long ones after it
+    text = "a " * 20 + "Omar" + " abcdefghij" * 10
+    collection = extractor.extract_entities(text)
+    
+    observation = collection.entities[0].metadata["observations"][0]
+    assert observation.context_before == "a " * 10
+    assert observation.exact == "Omar"
+    assert observation.context_after == text[44:94]
+
+
+def test_extract_relationships_from_parsed_doc():
+    """Test relationship extraction on a hand-parsed document."""
+    extractor = SpacyEntityExtractor(load_model=False)
+    
+    # "Omar El uses Python. Alice uses it."
+    doc = make_doc(
+        words=["Omar", "El", "uses", "Python", ".", "Alice", "uses", "it", "."],
+        heads=[1, 2, 2, 2, 2, 6, 6, 6, 6],
+        deps=["compound", "nsubj", "ROOT", "dobj", "punct", "nsubj", "ROOT", "dobj", "punct"],
+        pos=["PROPN", "PROPN", "VERB", "PROPN", "PUNCT", "PROPN", "VERB", "PRON", "PUNCT"],
+        ents=["B-PERSON", "I-PERSON", "O", "B-LANGUAGE", "O", "B-PERSON", "O", "O", "O"],
+    )
+    collection = extractor._process_doc(doc, "parsed", "2026-01-01T00:00:00")
+    
+    names = {entity.id: entity.name for entity in collection.entities}
+    assert sorted(names.values()) == ["Alice", "Omar El", "Python"]
+    
+    # The multi-word subject is found through its head token, and the second
+    # sentence, with a single entity, gives no relationship
+    assert [
+        (names[r.source_entity], r.type, names[r.target_entity])
+        for r in collection.relationships
+    ] == [("Omar El", "uses", "Python")]
+    
+    observation = collection.relationships[0].metadata["observations"][0]
+    assert observation.source == "parsed"
+
+
+def test_extract_relationships_needs_two_entities():
+    """Test that a document with a single entity gives no relationships."""
+    extractor = SpacyEntityExtractor(load_model=False)
+    
+    # "Omar uses it."
+    doc = make_doc(
+        words=["Omar", "uses", "it", "."],
+        heads=[1, 1, 1, 1],
+        deps=["nsubj", "ROOT", "dobj", "punct"],
+        pos=["PROPN", "VERB", "PRON", "PUNCT"],
+        ents=["B-PERSON", "O", "O", "O"],
+    )
+    collection = extractor._process_doc(doc, None, "2026-01-01T00:00:00")
+    
+    assert [entity.name for entity in collection.entities] == ["Omar"]
+    assert collection.relationships == []
+    assert collection.entities[0].metadata["observations"][0].source == "unknown"